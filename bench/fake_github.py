@@ -0,0 +1,307 @@
+# fake_github.py
+# Servidor HTTP local que imita las partes de la API de GitHub que usa la tienda:
+# API de contenidos (GET con ETag/304, PUT con control de SHA -> 409), Git Data API
+# (blobs, trees, commits, refs sin force -> 422) y raw.githubusercontent.com. Como
+# GitHub, la API de contenidos no incluye archivos de más de 1 MB (encoding "none") y
+# el blob se puede pedir crudo (Accept: application/vnd.github.raw+json).
+# Con --rate-limit emula la cuota por hora del token: cabeceras X-RateLimit-* en cada
+# respuesta de la API, las 304 no descuentan y al agotarse responde 403.
+#
+#     python -m bench.fake_github --root <carpeta con files_csv/, img/...> --port 8765
+#
+# y luego correr la app con GITHUB_API_URL=http://127.0.0.1:8765.
+
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+import socket
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+# Tamaño máximo que la API de contenidos devuelve en el campo `content`
+CONTENTS_INLINE_LIMIT = 1024 * 1024
+
+
+def blob_sha(content):
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class FakeRepo:
+    """Repositorio en memoria: un commit = {ruta: sha del blob}."""
+
+    def __init__(self, files=None, rate_limit=None, rate_window=3600):
+        self.lock = threading.Lock()
+        self.rate_limit = rate_limit
+        self.rate_remaining = rate_limit
+        self.rate_window = rate_window
+        self.rate_reset = time.time() + rate_window
+        self.blobs = {}
+        self.trees = {}      # sha -> {nombre: ("blob"|"tree", sha)}
+        self.commits = {}    # sha -> {"tree": sha, "parents": [...], "files": {ruta: sha}}
+        self.requests = 0
+        initial = {path: self._put_blob(content) for path, content in (files or {}).items()}
+        self.head = self._commit(initial, [], "initial")
+
+    def spend(self, status):
+        """Descuenta la cuota (las 304 no cuentan). Devuelve las cabeceras X-RateLimit-*
+        o None si la cuota ya estaba agotada."""
+        with self.lock:
+            if time.time() >= self.rate_reset:
+                self.rate_remaining = self.rate_limit
+                self.rate_reset = time.time() + self.rate_window
+            if self.rate_remaining == 0:
+                return None
+            if status != 304:
+                self.rate_remaining -= 1
+            return {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(self.rate_remaining),
+                "X-RateLimit-Reset": str(int(self.rate_reset)),
+                "X-RateLimit-Resource": "core",
+            }
+
+    @classmethod
+    def from_directory(cls, root, **kwargs):
+        files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                full_path = os.path.join(directory, name)
+                rel_path = os.path.relpath(full_path, root).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    files[rel_path] = f.read()
+        return cls(files, **kwargs)
+
+    def _put_blob(self, content):
+        sha = blob_sha(content)
+        self.blobs[sha] = content
+        return sha
+
+    def _build_tree(self, files):
+        children = {}
+        for path, sha in files.items():
+            name, _, rest = path.partition("/")
+            if rest:
+                children.setdefault(name, {})[rest] = sha
+            else:
+                children[name] = sha
+        entries = {}
+        for name, value in children.items():
+            if isinstance(value, dict):
+                entries[name] = ("tree", self._build_tree(value))
+            else:
+                entries[name] = ("blob", value)
+        tree_sha = hashlib.sha1(json.dumps(sorted(entries.items())).encode()).hexdigest()
+        self.trees[tree_sha] = entries
+        return tree_sha
+
+    def _commit(self, files, parents, message):
+        tree_sha = self._build_tree(files)
+        commit_sha = hashlib.sha1(json.dumps([tree_sha, parents, message, len(self.commits)]).encode()).hexdigest()
+        self.commits[commit_sha] = {"tree": tree_sha, "parents": parents, "files": dict(files), "message": message}
+        return commit_sha
+
+    def _files_of_tree(self, tree_sha, prefix=""):
+        files = {}
+        for name, (kind, sha) in self.trees[tree_sha].items():
+            if kind == "tree":
+                files.update(self._files_of_tree(sha, f"{prefix}{name}/"))
+            else:
+                files[f"{prefix}{name}"] = sha
+        return files
+
+    @property
+    def files(self):
+        return self.commits[self.head]["files"]
+
+    def read(self, path):
+        sha = self.files.get(path)
+        return (self.blobs[sha], sha) if sha else (None, None)
+
+    def put(self, path, content, sha, message):
+        """PUT de la API de contenidos. Devuelve el sha nuevo o None si `sha` no coincide."""
+        with self.lock:
+            if self.files.get(path) != sha:
+                return None
+            files = dict(self.files)
+            files[path] = self._put_blob(content)
+            self.head = self._commit(files, [self.head], message)
+            return files[path]
+
+    def create_tree(self, base_tree, entries):
+        with self.lock:
+            files = self._files_of_tree(base_tree) if base_tree else {}
+            for entry in entries:
+                if entry.get("sha") is None:
+                    files.pop(entry["path"], None)
+                else:
+                    files[entry["path"]] = entry["sha"]
+            return self._build_tree(files)
+
+    def create_commit(self, tree_sha, parents, message):
+        with self.lock:
+            return self._commit(self._files_of_tree(tree_sha), parents, message)
+
+    def update_ref(self, commit_sha, force=False):
+        with self.lock:
+            if not force and self.commits[commit_sha]["parents"][:1] != [self.head]:
+                return False
+            self.head = commit_sha
+            return True
+
+
+class Handler(BaseHTTPRequestHandler):
+    repo = None
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Sin Nagle: cabeceras y cuerpo van en escrituras separadas y el ACK retrasado
+        # agregaría ~40 ms por respuesta que GitHub no tiene
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload=None, headers=None, raw=None, api=False):
+        # Cuenta para la cuota todo menos raw.githubusercontent.com
+        if self.repo.rate_limit is not None and (raw is None or api):
+            quota = self.repo.spend(status)
+            if quota is None:
+                status, payload, headers = 403, {"message": "API rate limit exceeded"}, {
+                    "X-RateLimit-Limit": str(self.repo.rate_limit),
+                    "X-RateLimit-Remaining": "0",
+                    "X-RateLimit-Reset": str(int(self.repo.rate_reset)),
+                }
+            else:
+                headers = {**(headers or {}), **quota}
+        body = raw if raw is not None else (json.dumps(payload).encode() if payload is not None else b"")
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _route(self):
+        self.repo.requests += 1
+        path = urlparse(self.path).path
+        # raw.githubusercontent.com/<owner>/<repo>/<branch>/<ruta>
+        if path.startswith("/raw/"):
+            return "raw", path.split("/", 5)[5]
+        parts = path.split("/", 5)   # '', 'repos', owner, repo, kind, rest
+        if len(parts) < 6 or parts[1] != "repos":
+            return None, None
+        return parts[4], parts[5]
+
+    def do_GET(self):
+        kind, rest = self._route()
+        if kind == "raw":
+            content, _ = self.repo.read(rest)
+            return self._send(200, raw=content) if content is not None else self._send(404, raw=b"404: Not Found")
+        if kind == "contents":
+            content, sha = self.repo.read(rest)
+            if content is None:
+                return self._send(404, {"message": "Not Found"})
+            etag = f'"{sha}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            if len(content) > CONTENTS_INLINE_LIMIT:
+                return self._send(200, {
+                    "path": rest, "sha": sha, "size": len(content), "encoding": "none", "content": "",
+                }, headers={"ETag": etag})
+            return self._send(200, {
+                "path": rest, "sha": sha, "size": len(content), "encoding": "base64",
+                "content": base64.encodebytes(content).decode(),
+            }, headers={"ETag": etag})
+        if kind == "git":
+            if rest.startswith("ref/heads/") or rest.startswith("refs/heads/"):
+                return self._send(200, {"object": {"sha": self.repo.head, "type": "commit"}})
+            if rest.startswith("commits/"):
+                commit = self.repo.commits.get(rest.split("/", 1)[1])
+                if commit is None:
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, {"tree": {"sha": commit["tree"]}, "parents": [{"sha": p} for p in commit["parents"]]})
+            if rest.startswith("trees/"):
+                entries = self.repo.trees.get(rest.split("/", 1)[1])
+                if entries is None:
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, {"tree": [
+                    {"path": name, "type": kind_, "sha": sha} for name, (kind_, sha) in entries.items()
+                ]})
+            if rest.startswith("blobs/"):
+                content = self.repo.blobs.get(rest.split("/", 1)[1])
+                if content is None:
+                    return self._send(404, {"message": "Not Found"})
+                if "raw" in self.headers.get("Accept", ""):
+                    return self._send(200, raw=content, api=True)
+                return self._send(200, {"content": base64.b64encode(content).decode(), "encoding": "base64", "size": len(content)})
+        self._send(404, {"message": "Not Found"})
+
+    def do_PUT(self):
+        kind, rest = self._route()
+        if kind != "contents":
+            return self._send(404, {"message": "Not Found"})
+        body = self._body()
+        content = base64.b64decode(body["content"])
+        new_sha = self.repo.put(rest, content, body.get("sha"), body.get("message", ""))
+        if new_sha is None:
+            return self._send(409, {"message": f"{rest} does not match {body.get('sha')}"})
+        self._send(200, {"content": {"path": rest, "sha": new_sha}, "commit": {"sha": self.repo.head}})
+
+    def do_POST(self):
+        kind, rest = self._route()
+        body = self._body()
+        if kind == "git" and rest == "blobs":
+            content = base64.b64decode(body["content"]) if body.get("encoding") == "base64" else body["content"].encode()
+            with self.repo.lock:
+                sha = self.repo._put_blob(content)
+            return self._send(201, {"sha": sha})
+        if kind == "git" and rest == "trees":
+            return self._send(201, {"sha": self.repo.create_tree(body.get("base_tree"), body["tree"])})
+        if kind == "git" and rest == "commits":
+            return self._send(201, {"sha": self.repo.create_commit(body["tree"], body.get("parents", []), body.get("message", ""))})
+        self._send(404, {"message": "Not Found"})
+
+    def do_PATCH(self):
+        kind, rest = self._route()
+        if kind == "git" and rest.startswith("refs/heads/"):
+            body = self._body()
+            if body["sha"] not in self.repo.commits:
+                return self._send(422, {"message": "Object does not exist"})
+            if not self.repo.update_ref(body["sha"], body.get("force", False)):
+                return self._send(422, {"message": "Update is not a fast forward"})
+            return self._send(200, {"object": {"sha": body["sha"]}})
+        self._send(404, {"message": "Not Found"})
+
+
+def serve(repo, host="127.0.0.1", port=0):
+    """Arranca el servidor en un hilo. Devuelve (server, url base)."""
+    handler = type("BoundHandler", (Handler,), {"repo": repo})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GitHub API local para pruebas y benchmarks")
+    parser.add_argument("--root", required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate-limit", type=int, help="Peticiones por hora (sin límite si se omite)")
+    args = parser.parse_args()
+    server, url = serve(FakeRepo.from_directory(args.root, rate_limit=args.rate_limit), args.host, args.port)
+    print(f"GitHub local en {url} (GITHUB_API_URL={url})", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,404 @@
+# load.py
+# Prueba de carga de la tienda: N sesiones simultáneas contra `streamlit run main.py`,
+# hablando el mismo protocolo que el navegador (websocket + protobuf) y con el catálogo
+# servido por el GitHub local (bench/fake_github.py). No usa la red.
+#
+#     python -m bench.load                                   # 1, 10 y 25 sesiones, 1k productos
+#     python -m bench.load --sessions 50 --products 10000 --interactions 30 --json carga.json
+#
+# Cada sesión entra a la tienda, recorre categorías, cambia de tipo y agrega productos al
+# carrito (con una pausa aleatoria entre clicks; cada click re-ejecuta solo el fragmento
+# del carrito del sidebar). Por cada nivel de concurrencia se levanta un proceso de
+# Streamlit nuevo y se informa:
+#   - latencia de cada rerun (del mensaje del cliente hasta script_finished), por interacción
+#   - CPU del proceso de Streamlit (% de un núcleo) durante la prueba
+#   - memoria por sesión: (RSS máximo - RSS con la tienda ya cargada) / sesiones
+#   - bytes del websocket por interacción (payload sin comprimir, en ambos sentidos)
+# CPU y memoria se leen de /proc: fuera de Linux quedan en blanco.
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+# Antes de importar la app: credenciales de prueba (el servidor local no las valida)
+os.environ.setdefault("GITHUB_TOKEN", "bench")
+os.environ.setdefault("GITHUB_REPO", "bench/tienda")
+
+from websockets.asyncio.client import connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+import github_client
+import catalog_store
+from bench import synthetic
+from bench.fake_github import FakeRepo, serve
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SESSIONS = (1, 10, 25)
+STARTUP_TIMEOUT = 60
+RERUN_TIMEOUT = 120
+# Probabilidad de cada interacción (si la categoría no tiene tipos, "tipo" pasa a "categoria")
+INTERACTIONS = (("categoria", 0.35), ("tipo", 0.25), ("carrito", 0.40))
+CATEGORY_LABEL = "Categoría"
+SUBCATEGORY_LABEL = "Selecciona tipo"
+ADD_TO_CART_LABEL = "Agregar al Carrito"
+_DONE = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+
+
+# --- PROCESO DE STREAMLIT ---
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def prepare_store(db_path, api_url):
+    """Deja el catálogo ya sincronizado en la base local, así el servidor arranca con datos."""
+    github_client.GITHUB_API_URL = api_url
+    catalog_store.GitHubSync(catalog_store.CatalogStore(db_path)).pull_all()
+
+
+def start_server(db_path, api_url, log_file):
+    port = _free_port()
+    env = dict(
+        os.environ,
+        GITHUB_API_URL=api_url,
+        CATALOG_DB_PATH=db_path,
+        PYTHONPATH=ROOT,
+    )
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, "main.py"),
+            "--server.headless", "true",
+            "--server.address", "127.0.0.1",
+            "--server.port", str(port),
+            "--server.enableXsrfProtection", "false",
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+        ],
+        cwd=ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Streamlit terminó al arrancar (código {process.returncode})")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Streamlit no respondió a tiempo")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def _cpu_seconds(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Campos 14 y 15 (utime, stime), contados después del nombre entre paréntesis
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+# --- SESIÓN (UN NAVEGADOR) ---
+
+class Session:
+    """Cliente de la tienda: envía reruns con el estado de sus widgets y espera script_finished."""
+
+    def __init__(self, url, rng, stats):
+        self.url = url
+        self.rng = rng
+        self.stats = stats
+        self.ws = None
+        self.page_script_hash = ""
+        self.widgets = {}      # id -> (tipo, proto, fragment_id) de la última corrida
+        self.values = {}       # id -> WidgetState que el navegador reenvía en cada rerun
+
+    async def __aenter__(self):
+        self.ws = await connect(self.url, subprotocols=["streamlit"], max_size=None, open_timeout=30)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.ws.close()
+
+    def _find(self, kind, label):
+        return [(wid, proto, fragment_id) for wid, (k, proto, fragment_id) in self.widgets.items()
+                if k == kind and proto.label == label]
+
+    async def rerun(self, interaction, trigger=None, fragment_id=""):
+        back_msg = BackMsg()
+        state = back_msg.rerun_script
+        state.page_script_hash = self.page_script_hash
+        if fragment_id:
+            state.fragment_id = fragment_id
+        # Como el navegador, solo se envía el estado de los widgets que están en pantalla
+        state.widget_states.widgets.extend(v for wid, v in self.values.items() if wid in self.widgets)
+        if trigger:
+            state.widget_states.widgets.append(WidgetState(id=trigger, trigger_value=True))
+        if not fragment_id:
+            # Una corrida completa vuelve a dibujar todo: solo quedan los widgets que aparezcan
+            self.widgets = {}
+
+        payload = back_msg.SerializeToString()
+        bytes_in = 0
+        start = time.perf_counter()
+        await self.ws.send(payload)
+        while True:
+            data = await asyncio.wait_for(self.ws.recv(), RERUN_TIMEOUT)
+            bytes_in += len(data)
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            if self._handle(msg):
+                break
+        self.stats.record(interaction, (time.perf_counter() - start) * 1000, bytes_in, len(payload))
+
+    def _handle(self, msg):
+        """Procesa un ForwardMsg; True cuando terminó la corrida en curso."""
+        kind = msg.WhichOneof("type")
+        if kind == "new_session":
+            self.page_script_hash = msg.new_session.page_script_hash
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            element = msg.delta.new_element
+            element_type = element.WhichOneof("type")
+            if element_type in ("radio", "button"):
+                proto = getattr(element, element_type)
+                self.widgets[proto.id] = (element_type, proto, msg.delta.fragment_id)
+            elif element_type == "exception":
+                self.stats.errors.append(element.exception.message)
+        elif kind == "script_finished":
+            # El click en "Agregar al Carrito" corta su corrida y sigue con el fragmento del carrito
+            if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return False
+            if msg.script_finished not in _DONE:
+                self.stats.errors.append(ForwardMsg.ScriptFinishedStatus.Name(msg.script_finished))
+            return True
+        return False
+
+    def _choose_radio(self, label):
+        radios = self._find("radio", label)
+        if not radios:
+            return False
+        wid, proto, _ = radios[0]
+        current = self.values.get(wid)
+        options = [o for o in proto.options if not current or o != current.string_value] or list(proto.options)
+        self.values[wid] = WidgetState(id=wid, string_value=self.rng.choice(options))
+        return True
+
+    async def interact(self):
+        interaction = self.rng.choices(*zip(*INTERACTIONS))[0]
+        if interaction == "tipo" and self._choose_radio(SUBCATEGORY_LABEL):
+            await self.rerun("tipo")
+            return
+        if interaction == "carrito":
+            buttons = self._find("button", ADD_TO_CART_LABEL)
+            if buttons:
+                wid, _, fragment_id = self.rng.choice(buttons)
+                await self.rerun("carrito", trigger=wid, fragment_id=fragment_id)
+                return
+        if self._choose_radio(CATEGORY_LABEL):
+            await self.rerun("categoria")
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.bytes_in = {}
+        self.bytes_out = {}
+        self.errors = []
+
+    def record(self, interaction, ms, bytes_in, bytes_out):
+        self.latencies.setdefault(interaction, []).append(ms)
+        self.bytes_in.setdefault(interaction, []).append(bytes_in)
+        self.bytes_out.setdefault(interaction, []).append(bytes_out)
+
+
+async def shopper(url, seed, interactions, think, stats, loaded):
+    rng = random.Random(seed)
+    async with Session(url, rng, stats) as session:
+        await session.rerun("carga")
+        loaded.append(seed)
+        for _ in range(interactions):
+            # Pausa del usuario entre clicks
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+            await session.interact()
+
+
+# --- MEDICIÓN ---
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def summarize(stats):
+    rows = {}
+    all_latencies = []
+    for interaction, latencies in stats.latencies.items():
+        values = sorted(latencies)
+        all_latencies.extend(values)
+        rows[interaction] = {
+            "n": len(values),
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "p99": _percentile(values, 0.99),
+            "bytes_in": sum(stats.bytes_in[interaction]) / len(values),
+            "bytes_out": sum(stats.bytes_out[interaction]) / len(values),
+        }
+    if all_latencies:
+        all_latencies.sort()
+        rows["todas"] = {
+            "n": len(all_latencies),
+            "p50": _percentile(all_latencies, 0.5),
+            "p95": _percentile(all_latencies, 0.95),
+            "p99": _percentile(all_latencies, 0.99),
+            "bytes_in": sum(sum(v) for v in stats.bytes_in.values()) / len(all_latencies),
+            "bytes_out": sum(sum(v) for v in stats.bytes_out.values()) / len(all_latencies),
+        }
+    return rows
+
+
+async def _monitor(pid, samples, stop):
+    while not stop.is_set():
+        rss = _rss_bytes(pid)
+        if rss is not None:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.2)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_level(port, pid, n_sessions, interactions, think, seed):
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    # Precalentar: la primera corrida del proceso arma el catálogo memoizado
+    warmup = Stats()
+    async with Session(url, random.Random(seed), warmup) as session:
+        await session.rerun("carga")
+    if warmup.errors:
+        raise RuntimeError(f"La tienda falló al cargar: {warmup.errors[0]}")
+
+    stats = Stats()
+    rss_base = _rss_bytes(pid)
+    cpu_start = _cpu_seconds(pid)
+    rss_samples, loaded, stop = [], [], asyncio.Event()
+    monitor = asyncio.create_task(_monitor(pid, rss_samples, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        shopper(url, seed + i + 1, interactions, think, stats, loaded) for i in range(n_sessions)
+    ))
+    wall = time.perf_counter() - start
+    cpu_end = _cpu_seconds(pid)
+    stop.set()
+    await monitor
+
+    result = {
+        "sessions": n_sessions,
+        "wall_s": wall,
+        "warmup_ms": warmup.latencies["carga"][0],
+        "cpu_percent": (cpu_end - cpu_start) / wall * 100 if cpu_start is not None else None,
+        "rss_base_mb": rss_base / 1e6 if rss_base else None,
+        "mb_per_session": (max(rss_samples) - rss_base) / 1e6 / n_sessions if rss_samples and rss_base else None,
+        "errors": stats.errors[:10],
+        "n_errors": len(stats.errors),
+        "interactions": summarize(stats),
+    }
+    return result
+
+
+def bench_level(n_sessions, args, db_path, api_url, log_file):
+    process, port = start_server(db_path, api_url, log_file)
+    try:
+        return asyncio.run(run_level(port, process.pid, n_sessions, args.interactions, args.think, args.seed))
+    finally:
+        stop_server(process)
+
+
+def _optional(value, fmt):
+    return format(value, fmt) if value is not None else "-"
+
+
+def print_table(results, n_products):
+    for result in results:
+        print(f"\n== {result['sessions']} sesión(es), {n_products:,} productos "
+              f"({result['wall_s']:.1f} s, {result['n_errors']} error(es))")
+        print(f"CPU {_optional(result['cpu_percent'], '.0f')} % de un núcleo | "
+              f"memoria {_optional(result['mb_per_session'], '.2f')} MB por sesión "
+              f"(base {_optional(result['rss_base_mb'], '.0f')} MB) | "
+              f"primera carga del proceso {result['warmup_ms']:.0f} ms")
+        print(f"{'interacción':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'KB in':>9}{'KB out':>9}")
+        for interaction, row in result["interactions"].items():
+            print(f"{interaction:<16}{row['n']:>6}{row['p50']:10.1f}{row['p95']:10.1f}{row['p99']:10.1f}"
+                  f"{row['bytes_in'] / 1024:9.1f}{row['bytes_out'] / 1024:9.2f}")
+        for error in result["errors"]:
+            print(f"ERROR: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la tienda con sesiones simultáneas")
+    parser.add_argument("--sessions", default=",".join(str(s) for s in DEFAULT_SESSIONS),
+                        help="Niveles de concurrencia, separados por coma")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--interactions", type=int, default=20, help="Clicks por sesión")
+    parser.add_argument("--think", type=float, default=0.5, help="Pausa media entre clicks (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    repo = FakeRepo(synthetic.generate(None, args.products))
+    server, api_url = serve(repo)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            db_path = os.path.join(workdir, "catalog.sqlite3")
+            prepare_store(db_path, api_url)
+            with open(os.path.join(workdir, "streamlit.log"), "w+") as log_file:
+                for n_sessions in (int(s) for s in args.sessions.split(",")):
+                    print(f"{n_sessions} sesión(es)...", flush=True)
+                    try:
+                        results.append(bench_level(n_sessions, args, db_path, api_url, log_file))
+                    except Exception:
+                        log_file.seek(0)
+                        sys.stderr.write(log_file.read()[-4000:])
+                        raise
+    finally:
+        server.shutdown()
+
+    print_table(results, args.products)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"products": args.products, "levels": results}, f, indent=2)
+    return 1 if any(result["n_errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# run.py
+# Benchmarks de la tienda y del guardado del admin contra un GitHub local
+# (bench/fake_github.py) con catálogos sintéticos (bench/synthetic.py). No usa la red.
+#
+#     python -m bench.run                          # 100, 1k, 10k y 50k productos
+#     python -m bench.run --sizes 100,1000 --repeat 7
+#     python -m bench.run --save-baseline          # guarda la línea base (bench/baseline.json)
+#
+# Con una línea base guardada, cada corrida la compara y termina con código 1 si
+# alguna etapa empeoró más que --tolerance (la línea base depende de la máquina:
+# generarla y compararla en la misma).
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+# Antes de importar la app: credenciales de prueba (el servidor local no las valida)
+os.environ.setdefault("GITHUB_TOKEN", "bench")
+os.environ.setdefault("GITHUB_REPO", "bench/tienda")
+
+import github_client
+import catalog
+import catalog_store
+import changesets
+from bench import synthetic
+from bench.fake_github import FakeRepo, serve
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+SEARCH_QUERIES = ("corazon", "acero aros", "trebol luna", "a", "zzz")
+# Una página de la grilla (main.PAGE_SIZE)
+SEARCH_LIMIT = 12
+# Diferencias menores que esto (ms) son ruido aunque superen la tolerancia
+MIN_REGRESSION_MS = 1.0
+
+
+def measure(fn, repeat, setup=None):
+    """Ejecuta `fn` `repeat` veces (con el resultado de `setup` como argumento, sin cronometrarlo)."""
+    samples = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "min": samples[0],
+    }
+
+
+def bench_size(n_products, repeat, workdir, with_apptest=True):
+    files = synthetic.generate(None, n_products)
+    repo = FakeRepo(files)
+    server, url = serve(repo)
+    github_client.GITHUB_API_URL = url
+    results = {}
+    counter = iter(range(1_000_000))
+
+    def fresh_store():
+        return catalog_store.CatalogStore(os.path.join(workdir, f"{n_products}_{next(counter)}.sqlite3"))
+
+    try:
+        # Tienda: traer products.csv (descarga + parseo + carga en SQLite) y consulta sin cambios (304).
+        # Desde ~10k productos el CSV supera 1 MB y se lee del blob en streaming
+        results["pull_products"] = measure(
+            lambda sync: sync.pull(catalog_store.PRODUCTS_PATH), repeat,
+            setup=lambda: catalog_store.GitHubSync(fresh_store()),
+        )
+        store = fresh_store()
+        sync = catalog_store.GitHubSync(store)
+        sync.pull_all()
+        results["pull_unchanged"] = measure(lambda: sync.pull(catalog_store.PRODUCTS_PATH), repeat)
+        results["pull_all_unchanged"] = measure(sync.pull_all, repeat)
+
+        csv_text = files[catalog_store.PRODUCTS_PATH].decode("utf-8")
+        results["parse_csv"] = measure(lambda: catalog_store.parse_products_csv(csv_text), repeat)
+        # Parseo tipado por bloques que usa la carga en SQLite
+        results["parse_csv_rows"] = measure(lambda: list(catalog_store.iter_product_rows(csv_text)), repeat)
+        results["read_products"] = measure(store.read_products, repeat)
+
+        # Split de categorías, orden e índices (por versión del CSV)
+        products_df = store.read_products()
+        results["build_catalog"] = measure(lambda: catalog.build_catalog(products_df, version=1), repeat)
+        store_catalog = catalog.build_catalog(products_df, version=1)
+
+        # Filtrado de store_page: todas las combinaciones categoría/tipo
+        def select_all():
+            store_catalog.select(catalog.ALL_CATEGORIES)
+            for main_cat in store_catalog.main_categories:
+                store_catalog.select(main_cat)
+                for sub_cat in store_catalog.subcategories.get(main_cat, ()):
+                    store_catalog.select(main_cat, sub_cat)
+
+        results["select_all_filters"] = measure(select_all, repeat)
+        results["search"] = measure(lambda: [store_catalog.search(q, limit=SEARCH_LIMIT) for q in SEARCH_QUERIES], repeat)
+
+        # Carrito: 50 ítems sobre 10 productos distintos
+        import main as store_app
+        rng = random.Random(0)
+        sample = products_df.sample(min(10, len(products_df)), random_state=0)
+        cart = [
+            {"name": row["name"], "price": row["price"]}
+            for row in sample.to_dict("records") for _ in range(rng.randrange(1, 10))
+        ][:50]
+        results["group_cart"] = measure(lambda: store_app.group_cart(cart), repeat)
+
+        # Admin: guardar un cambio de stock (parche local + commit en el GitHub local)
+        ids = products_df["id"].tolist()
+
+        def save_change():
+            row_id = rng.choice(ids)
+            store.apply_changes(
+                changesets.ChangeSet(updated={row_id: {"stock": rng.randrange(1, 50)}}), "bench: stock"
+            )
+            sync.push_pending()
+
+        results["save_change"] = measure(save_change, repeat)
+
+        if with_apptest:
+            results.update(bench_apptest(store, sync, repeat))
+    finally:
+        server.shutdown()
+    results["_github_requests"] = repo.requests
+    return results
+
+
+def bench_apptest(store, sync, repeat):
+    """Corrida completa de main.py con AppTest: primera (catálogo sin memoizar) y reruns."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    catalog_store._store = store
+    store.sync = sync
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+    def cold_run():
+        st.cache_resource.clear()
+        app = AppTest.from_file(script, default_timeout=120)
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+
+    results = {"apptest_cold": measure(cold_run, repeat)}
+    app = AppTest.from_file(script, default_timeout=120).run()
+    results["apptest_rerun"] = measure(app.run, repeat)
+    catalog_store._store = None
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """[(tamaño, etapa, base ms, actual ms)] de las etapas que empeoraron."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, stats in stages.items():
+            base = baseline.get(size, {}).get(stage)
+            if not isinstance(stats, dict) or not base:
+                continue
+            if stats["p50"] > base["p50"] * (1 + tolerance) and stats["p50"] - base["p50"] > MIN_REGRESSION_MS:
+                regressions.append((size, stage, base["p50"], stats["p50"]))
+    return regressions
+
+
+def print_table(results, baseline):
+    for size, stages in results.items():
+        print(f"\n== {int(size):,} productos ({stages.get('_github_requests', 0)} peticiones al GitHub local)")
+        print(f"{'etapa':<22}{'p50 ms':>10}{'p95 ms':>10}{'base p50':>10}")
+        for stage, stats in stages.items():
+            if not isinstance(stats, dict):
+                continue
+            base = baseline.get(size, {}).get(stage, {}).get("p50")
+            base_text = f"{base:10.2f}" if base else f"{'-':>10}"
+            print(f"{stage:<22}{stats['p50']:10.2f}{stats['p95']:10.2f}{base_text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de la tienda con un GitHub local")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-apptest", action="store_true", help="Omitir la corrida completa con AppTest")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Empeoramiento tolerado (0.25 = 25 %%)")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(s) for s in args.sizes.split(",")):
+            print(f"Midiendo {size:,} productos...", flush=True)
+            results[str(size)] = bench_size(size, args.repeat, workdir, with_apptest=not args.no_apptest)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nLínea base guardada en {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for size, stage, base, current in regressions:
+        print(f"REGRESIÓN {size} productos / {stage}: {base:.2f} ms -> {current:.2f} ms")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# synthetic.py
+# Catálogos sintéticos para los benchmarks: products.csv, categories.json, el tema y
+# un img/ con fotos chicas (nombres por contenido, como las sube el panel admin).
+#
+#     python -m bench.synthetic --products 10000 --out /tmp/catalogo_10k
+
+import os
+import json
+import random
+import argparse
+from io import BytesIO
+
+import pandas as pd
+from PIL import Image
+
+import image_store
+
+CATEGORIES = {
+    "Acero Blanco": ["Aros", "Pulseras", "Collares", "Dijes", "Anillos"],
+    "Acero Dorado": ["Aros", "Pulseras", "Collares", "Dijes", "Anillos"],
+    "Acero Quirúrgico": ["Aros", "Pulseras", "Collares", "Dijes"],
+    "Plata": ["Aros", "Anillos"],
+    "LLAVEROS": ["Llaveros"],
+    "Pañuelos": [],
+    "Complementos": [],
+}
+WORDS = [
+    "corazón", "trébol", "estrella", "luna", "perla", "cruz", "infinito", "mariposa",
+    "flor", "gota", "argolla", "cadena", "dije", "brillo", "strass", "oso", "ángel",
+    "llave", "nudo", "serpiente", "hoja", "sol", "ojo", "turco", "piedra", "cristal",
+]
+CSS_SOURCE = "casino_theme.css"
+
+
+def _photo(rng, size=(320, 320)):
+    color = tuple(rng.randrange(256) for _ in range(3))
+    img = Image.new("RGB", size, color)
+    # Un bloque de otro color: cada foto tiene contenido (y hash) distinto
+    x, y = rng.randrange(size[0] // 2), rng.randrange(size[1] // 2)
+    img.paste(tuple(255 - c for c in color), (x, y, x + size[0] // 3, y + size[1] // 3))
+    buffer = BytesIO()
+    img.save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def products_frame(n_products, image_paths=(), seed=0):
+    """DataFrame con `n_products` productos repartidos entre las categorías de CATEGORIES."""
+    rng = random.Random(seed)
+    categories = [
+        f"{main} - {sub}" if sub else main
+        for main, subs in CATEGORIES.items()
+        for sub in (subs or [None])
+    ]
+    rows = []
+    for product_id in range(1, n_products + 1):
+        words = rng.sample(WORDS, 3)
+        rows.append({
+            "id": product_id,
+            "name": f"{words[0]} {words[1]} {product_id}".upper(),
+            "category": rng.choice(categories),
+            "price": float(rng.randrange(10, 500) * 100),
+            # ~20 % sin stock: la tienda los filtra
+            "stock": 0 if rng.random() < 0.2 else rng.randrange(1, 20),
+            "image_path": image_paths[product_id % len(image_paths)] if image_paths else "",
+            "description": f"{words[2].capitalize()} de {rng.choice(WORDS)} con {rng.choice(WORDS)}.",
+        })
+    return pd.DataFrame(rows)
+
+
+def generate(out_dir, n_products, n_images=50, seed=0):
+    """Escribe el catálogo en `out_dir` con la estructura del repo. Devuelve {ruta: bytes}."""
+    rng = random.Random(seed)
+    files = {}
+    image_paths = []
+    for i in range(n_images):
+        data = _photo(rng)
+        path = image_store.content_path(data, f"foto_{i}.jpg")
+        files[path] = data
+        image_paths.append(path)
+
+    files["files_csv/products.csv"] = products_frame(n_products, image_paths, seed).to_csv(index=False).encode("utf-8")
+    files["files_csv/categories.json"] = json.dumps(CATEGORIES, indent=4, ensure_ascii=False).encode("utf-8")
+    if os.path.exists(CSS_SOURCE):
+        with open(CSS_SOURCE, "rb") as f:
+            files["casino_theme.css"] = f.read()
+
+    if out_dir:
+        for path, content in files.items():
+            full_path = os.path.join(out_dir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "wb") as f:
+                f.write(content)
+    return files
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un catálogo sintético")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    generate(args.out, args.products, args.images, args.seed)
+    print(f"Catálogo de {args.products} productos en {args.out}")
@@ -0,0 +1,185 @@
+# bulk_import.py
+# Importación masiva para el panel admin: una planilla (CSV o Excel) con los productos
+# y un ZIP con las fotos. Se valida todo antes de escribir (simulación), las fotos se
+# procesan en paralelo y el lote entero se guarda como un único ChangeSet, que el
+# store sube a GitHub en un solo commit junto con las imágenes.
+#
+# Columnas de la planilla: name, category ("Línea - Tipo" o solo "Línea"), price,
+# stock, image (nombre del archivo dentro del ZIP, opcional) y description.
+
+import os
+import re
+import numbers
+import zipfile
+from io import BytesIO
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+import image_pipeline
+import image_store
+from catalog import CATEGORY_SEPARATOR
+from catalog_store import PRODUCT_COLUMNS
+
+REQUIRED_COLUMNS = ('name', 'category', 'price')
+
+# Números de la planilla (formato argentino: punto de miles, coma decimal)
+_DOT_THOUSANDS = re.compile(r"[1-9]\d{0,2}(\.\d{3})+")                 # 7.500 / 1.234.567
+_COMMA_THOUSANDS = re.compile(r"[1-9]\d{0,2}(,\d{3})+")                 # 7,500: ¿7500 o 7,5?
+_COMMA_DECIMAL = re.compile(r"[1-9]\d{0,2}(\.\d{3})+,\d+|\d+,\d+")     # 7.500,50 / 7500,5
+_PLAIN_NUMBER = re.compile(r"\d+(\.\d+)?")                             # 7500 / 7500.5
+AMBIGUOUS_NUMBER = "formato ambiguo, usá 7500, 7.500 o 7500,50"
+
+
+@dataclass
+class ImportPlan:
+    rows: list = field(default_factory=list)       # filas listas para el ChangeSet (id provisorio)
+    errors: list = field(default_factory=list)     # (fila de la planilla, mensaje)
+    warnings: list = field(default_factory=list)   # (fila de la planilla, mensaje)
+    photos: dict = field(default_factory=dict)     # nombre en el ZIP -> bytes del original
+
+    @property
+    def ok(self):
+        return bool(self.rows) and not self.errors
+
+    def report(self):
+        """DataFrame para mostrar en la simulación."""
+        return pd.DataFrame(self.rows, columns=PRODUCT_COLUMNS)
+
+
+def read_sheet(file_name, data):
+    """Planilla (bytes) -> DataFrame con columnas en minúsculas. Excel necesita openpyxl."""
+    if file_name.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(BytesIO(data), dtype=object)
+    else:
+        df = pd.read_csv(BytesIO(data), dtype=object, sep=None, engine="python", encoding="utf-8-sig")
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+
+def read_photos(data):
+    """ZIP (bytes) -> {nombre de archivo: bytes}. Se ignoran carpetas y archivos que no son fotos."""
+    photos = {}
+    with zipfile.ZipFile(BytesIO(data)) as archive:
+        for info in archive.infolist():
+            file_name = os.path.basename(info.filename)
+            if info.is_dir() or file_name.startswith(".") or info.filename.startswith("__MACOSX/"):
+                continue
+            if file_name.lower().endswith(image_pipeline.SOURCE_EXTENSIONS):
+                photos[file_name] = archive.read(info)
+    return photos
+
+
+def _text(value):
+    return "" if value is None or pd.isna(value) else str(value).strip()
+
+
+def _category_key(text):
+    # "acero blanco-aros" == "Acero Blanco - Aros"
+    return re.sub(r"\s*-\s*", "-", text.strip().lower())
+
+
+def _number(value):
+    """Precio o stock de la planilla -> float. ValueError si no es un número o es ambiguo."""
+    text = _text(value)
+    if not text:
+        raise ValueError
+    # Celdas numéricas de Excel: ya son números ("12.345" sería un float, no miles)
+    if isinstance(value, numbers.Number) and not isinstance(value, bool):
+        return float(value)
+    text = re.sub(r"[\s$]", "", text)
+    if _DOT_THOUSANDS.fullmatch(text):
+        return float(text.replace(".", ""))
+    if _COMMA_THOUSANDS.fullmatch(text):
+        raise ValueError(AMBIGUOUS_NUMBER)
+    if _COMMA_DECIMAL.fullmatch(text):
+        return float(text.replace(".", "").replace(",", "."))
+    if _PLAIN_NUMBER.fullmatch(text):
+        return float(text)
+    raise ValueError
+
+
+def _detail(error):
+    return f": {error}" if error.args else ""
+
+
+def build_plan(sheet, photos, categories, next_id):
+    """Valida la planilla contra categories.json y las fotos del ZIP, y asigna ids desde `next_id`.
+
+    No escribe nada: el resultado sirve tanto para la simulación como para importar.
+    """
+    plan = ImportPlan()
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in sheet.columns]
+    if missing:
+        plan.errors.append((None, f"Faltan columnas en la planilla: {', '.join(missing)}"))
+        return plan
+
+    # Comparación flexible, pero se guarda el nombre tal como está en categories.json
+    valid_categories = {}
+    for main, subs in categories.items():
+        for full_name in ([f"{main}{CATEGORY_SEPARATOR}{sub}" for sub in subs] if subs else [main]):
+            valid_categories[_category_key(full_name)] = full_name
+    photos_by_name = {name.lower(): name for name in photos}
+    used_photos = set()
+
+    for position, record in enumerate(sheet.to_dict("records")):
+        line = position + 2  # fila 1 = encabezados
+        name = _text(record.get('name'))
+        if not name:
+            if any(_text(v) for v in record.values()):
+                plan.errors.append((line, "Falta el nombre."))
+            continue
+
+        category = valid_categories.get(_category_key(_text(record.get('category'))))
+        if category is None:
+            plan.errors.append((line, f"'{name}': la categoría '{_text(record.get('category'))}' no existe en categories.json."))
+
+        try:
+            price = _number(record.get('price'))
+            if price <= 0:
+                raise ValueError
+        except ValueError as e:
+            plan.errors.append((line, f"'{name}': precio inválido ({_text(record.get('price'))}){_detail(e)}."))
+            price = None
+
+        stock = 0
+        if _text(record.get('stock')):
+            try:
+                number = _number(record.get('stock'))
+                if number < 0 or number % 1:
+                    raise ValueError
+                stock = int(number)
+            except ValueError as e:
+                plan.errors.append((line, f"'{name}': stock inválido ({_text(record.get('stock'))}){_detail(e)}."))
+
+        image_path = ""
+        image_name = os.path.basename(_text(record.get('image')))
+        if image_name:
+            zip_name = photos_by_name.get(image_name.lower())
+            if zip_name is None:
+                plan.errors.append((line, f"'{name}': la foto '{image_name}' no está en el ZIP."))
+            else:
+                # Misma ruta que asigna image_store al subirla: la del contenido
+                image_path = image_store.content_path(photos[zip_name], zip_name)
+                plan.photos[zip_name] = photos[zip_name]
+                used_photos.add(zip_name)
+        else:
+            plan.warnings.append((line, f"'{name}': sin foto."))
+
+        plan.rows.append({
+            'id': next_id + len(plan.rows),
+            'name': name,
+            'category': category,
+            'price': price,
+            'stock': stock,
+            'image_path': image_path,
+            'description': _text(record.get('description')),
+        })
+
+    for unused in sorted(set(photos) - used_photos):
+        plan.warnings.append((None, f"La foto '{unused}' del ZIP no se usa en ninguna fila."))
+    if not plan.rows and not plan.errors:
+        plan.errors.append((None, "La planilla no tiene productos."))
+    return plan
+
@@ -0,0 +1,84 @@
+# catalog.py
+# Catálogo inmutable de la tienda, construido una sola vez por versión del CSV
+# (SHA del blob en GitHub). Precalcula las columnas main_cat/sub_cat de forma
+# vectorizada, ordena por id y arma un índice (categoría, tipo) -> posiciones,
+# de modo que cambiar de categoría o de filtro sea una búsqueda y no una pasada
+# completa por el DataFrame. También incluye el índice de búsqueda (search_index.py).
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from search_index import SearchIndex
+
+ALL_CATEGORIES = "Todas"
+CATEGORY_SEPARATOR = " - "
+
+
+def split_categories(categories):
+    """Separa 'Material - Tipo' en dos Series (main_cat, sub_cat). Sin tipo -> sub_cat None."""
+    parts = categories.astype("string").str.partition(CATEGORY_SEPARATOR)
+    main_cat = parts[0].astype(object).where(categories.notna(), None)
+    sub_cat = parts[2].astype(object).where(parts[1] == CATEGORY_SEPARATOR, None)
+    return main_cat, sub_cat
+
+
+@dataclass(frozen=True)
+class Catalog:
+    version: object
+    products: pd.DataFrame
+    main_categories: tuple
+    subcategories: dict
+    positions: dict = field(repr=False)
+    search_index: SearchIndex = field(repr=False)
+
+    def select(self, main_cat=ALL_CATEGORIES, sub_cat=None):
+        """Productos disponibles de (main_cat, sub_cat), ya ordenados por id."""
+        rows = self.positions.get((main_cat, sub_cat))
+        if rows is None:
+            return self.products.iloc[0:0]
+        return self.products.iloc[rows]
+
+    def search(self, query, limit=None):
+        """(hasta `limit` productos disponibles que coinciden con `query`, ordenados por
+        relevancia; total de coincidencias). Solo se materializan las filas devueltas."""
+        positions, total = self.search_index.search(query, limit=limit)
+        return self.products.iloc[positions], total
+
+
+def build_catalog(products_df, version=None):
+    """Construye el Catalog con los productos en stock de `products_df`.
+
+    El resultado se comparte entre sesiones: tratarlo como solo lectura.
+    """
+    available = products_df[products_df['stock'] > 0]
+    available = available.sort_values(by='id', ascending=True, kind="stable").reset_index(drop=True)
+
+    main_cat, sub_cat = split_categories(available['category'])
+    available = available.assign(main_cat=main_cat, sub_cat=sub_cat)
+
+    positions = {(ALL_CATEGORIES, None): np.arange(len(available))}
+    subcategories = {}
+
+    main_values = available['main_cat'].to_numpy()
+    sub_values = available['sub_cat'].to_numpy()
+    valid_main = pd.notna(main_values)
+    for main in pd.unique(main_values[valid_main]):
+        main_mask = main_values == main
+        positions[(main, None)] = np.flatnonzero(main_mask)
+
+        subs = []
+        for sub in pd.unique(sub_values[main_mask & pd.notna(sub_values)]):
+            positions[(main, sub)] = np.flatnonzero(main_mask & (sub_values == sub))
+            subs.append(sub)
+        subcategories[main] = tuple(sorted(subs))
+
+    return Catalog(
+        version=version,
+        products=available,
+        main_categories=tuple(sorted(subcategories)),
+        subcategories=subcategories,
+        positions=positions,
+        search_index=SearchIndex.build(available),
+    )
@@ -0,0 +1,902 @@
+# catalog_store.py
+# Almacenamiento local del catálogo (SQLite en modo WAL) usado por la tienda y el
+# panel admin. Las lecturas son consultas locales; las escrituras se guardan en
+# SQLite y un hilo en segundo plano (GitHubSync) las sube a GitHub, que sigue
+# siendo la copia durable. El mismo hilo trae los cambios remotos con peticiones
+# condicionales (ETag), así que un archivo sin cambios no gasta cuota de la API.
+# Cuando la cuota del token baja (github_client.budget) las consultas se espacian y
+# se limitan a los productos; la reserva queda para subir los guardados del admin.
+#
+# Archivos sincronizados: files_csv/products.csv (tabla `products`),
+# files_csv/categories.json, casino_theme.css y el manifiesto de imágenes
+# files_csv/images.json (tabla `documents`). Un products.csv de más de 1 MB (la API de
+# contenidos ya no lo incluye) se descarga del blob y se parsea por bloques mientras llega.
+#
+# Varias réplicas de la app en la misma máquina pueden usar la misma base: basta con
+# apuntar CATALOG_DB_PATH al mismo archivo. Todas leen las mismas filas ya parseadas,
+# una escritura del admin se ve en todas al instante y solo una réplica (la que tiene
+# el lock de sincronización) habla con GitHub. Solo en un disco local: el WAL de
+# SQLite usa memoria compartida y flock no es confiable en sistemas de archivos de red
+# (NFS/SMB), que no están soportados. Réplicas en máquinas distintas usan cada una su
+# propia base y se sincronizan a través de GitHub.
+
+import io
+import os
+import time
+import logging
+import sqlite3
+import threading
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos, cada réplica sincroniza por su cuenta
+    fcntl = None
+
+import json
+
+import pandas as pd
+
+import changesets
+import github_client
+import image_store
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("CATALOG_DB_PATH", os.path.join(".cache", "catalog.sqlite3"))
+PRODUCTS_PATH = "files_csv/products.csv"
+CATEGORIES_PATH = "files_csv/categories.json"
+CSS_PATH = "casino_theme.css"
+MANIFEST_PATH = image_store.MANIFEST_PATH
+DOCUMENT_PATHS = (CATEGORIES_PATH, CSS_PATH, MANIFEST_PATH)
+# Entrada de sync_state para los archivos binarios (imágenes) en cola de subida
+STAGED_KEY = "img/"
+
+PRODUCT_COLUMNS = ['id', 'name', 'category', 'price', 'stock', 'image_path', 'description']
+_INSERT_PRODUCT = (
+    f"INSERT INTO products ({', '.join(PRODUCT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(PRODUCT_COLUMNS))})"
+)
+_INSERT_INCOMING = _INSERT_PRODUCT.replace("INTO products ", "INTO products_incoming ", 1)
+
+# products.csv se lee por bloques y con tipos fijos (sin inferencia): id/price/stock
+# como texto, validados al convertirlos en el mismo recorrido, y category como categórica
+CSV_CHUNK_ROWS = 10000
+_CSV_DTYPES = {
+    "id": str, "name": str, "category": "category", "price": str,
+    "stock": str, "image_path": str, "description": str,
+}
+
+# Cada cuánto se consultan cambios remotos, y cuánto se espera tras una escritura
+# local para agrupar varias ediciones seguidas en un solo commit.
+SYNC_INTERVAL = 15
+PUSH_DELAY = 2
+# Reintentos de subida tras combinar con la versión remota (SHA desactualizado)
+MAX_MERGE_ATTEMPTS = 3
+# Espera antes de reintentar una subida fallida: se duplica en cada fallo seguido
+# (PUSH_RETRY_MIN, 2x, 4x... hasta PUSH_RETRY_MAX) y vuelve a cero al subir
+PUSH_RETRY_MIN = 5
+PUSH_RETRY_MAX = 300
+# Con poca cuota de la API solo se siguen consultando estos; el resto espera al reset
+URGENT_PATHS = (PRODUCTS_PATH,)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER,
+    name TEXT,
+    category TEXT,
+    price REAL,
+    stock INTEGER,
+    image_path TEXT,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_products_id ON products (id);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products (category, stock);
+
+-- products.csv remoto a medio descargar (archivos grandes, leídos en streaming): se
+-- copia a `products` en una sola transacción cuando terminó de llegar.
+CREATE TABLE IF NOT EXISTS products_incoming (
+    id INTEGER,
+    name TEXT,
+    category TEXT,
+    price REAL,
+    stock INTEGER,
+    image_path TEXT,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    content TEXT
+);
+
+-- Estado de sincronización por archivo. `revision` sube con cada cambio (local o
+-- remoto) y sirve como versión para las caches; hay cambios sin subir mientras
+-- revision > synced_revision.
+CREATE TABLE IF NOT EXISTS sync_state (
+    path TEXT PRIMARY KEY,
+    sha TEXT,
+    etag TEXT,
+    revision INTEGER NOT NULL DEFAULT 0,
+    synced_revision INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    synced_at REAL
+);
+
+-- Cambios locales pendientes de subir (mensajes de commit agrupados). Las
+-- ediciones del inventario guardan además su ChangeSet (changesets.py) en JSON.
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    message TEXT,
+    created_at REAL,
+    changeset TEXT
+);
+
+-- Archivos binarios (imágenes) a subir en el mismo commit que los cambios de datos.
+CREATE TABLE IF NOT EXISTS staged_files (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    content BLOB NOT NULL,
+    message TEXT,
+    created_at REAL
+);
+"""
+
+# Columnas agregadas después de la primera versión del esquema (bases ya existentes)
+_MIGRATIONS = (
+    ("outbox", "changeset", "TEXT"),
+    # Contenido de la última versión sincronizada: base del merge de tres vías
+    ("sync_state", "base", "TEXT"),
+    # Conflicto real pendiente de resolver en el panel (lista JSON) y la versión remota
+    ("sync_state", "conflict", "TEXT"),
+    ("sync_state", "conflict_sha", "TEXT"),
+    ("sync_state", "conflict_content", "TEXT"),
+    # Próximo reintento de una subida fallida (epoch; la ve el panel de cualquier réplica)
+    ("sync_state", "retry_at", "REAL"),
+)
+
+
+def parse_products_csv(text):
+    """CSV de productos -> DataFrame con price/stock numéricos."""
+    df = pd.read_csv(StringIO(text))
+    df['price'] = pd.to_numeric(df['price'], errors='coerce').fillna(0)
+    df['stock'] = pd.to_numeric(df['stock'], errors='coerce').fillna(0).astype(int)
+    return df
+
+
+def _product_rows(df):
+    df = changesets.clean_frame(df.reindex(columns=PRODUCT_COLUMNS))
+    return list(df.itertuples(index=False, name=None))
+
+
+def _numeric(column):
+    """Texto -> número; (valores, cantidad de valores presentes que no son números)."""
+    values = pd.to_numeric(column, errors='coerce')
+    return values, int((values.isna() & column.notna()).sum())
+
+
+def iter_product_rows(source, chunk_rows=CSV_CHUNK_ROWS):
+    """Filas de products.csv (texto o stream binario) listas para SQLite, de a `chunk_rows`.
+
+    Los valores inválidos quedan como antes (precio/stock 0, id vacío) y se informan en el log.
+    """
+    if isinstance(source, str):
+        source = StringIO(source)
+    invalid = 0
+    for chunk in pd.read_csv(source, dtype=_CSV_DTYPES, chunksize=chunk_rows, encoding="utf-8"):
+        chunk = chunk.reindex(columns=PRODUCT_COLUMNS)
+        ids, bad_ids = _numeric(chunk['id'])
+        price, bad_prices = _numeric(chunk['price'])
+        stock, bad_stock = _numeric(chunk['stock'])
+        fractional = ids.notna() & (ids % 1 != 0)
+        invalid += bad_ids + bad_prices + bad_stock + int(fractional.sum()) + int(chunk['id'].isna().sum())
+        chunk['id'] = ids.mask(fractional).astype("Int64")
+        chunk['price'] = price.fillna(0)
+        chunk['stock'] = stock.fillna(0).astype(int)
+        yield _product_rows(chunk)
+    if invalid:
+        logger.warning("%s: %d valor(es) de id, precio o stock inválidos", PRODUCTS_PATH, invalid)
+        metrics.count("sync.invalid_values", invalid)
+
+
+class _RecordingStream(io.RawIOBase):
+    """Stream de solo lectura que guarda lo leído (el texto queda como base del merge)."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.parts = []
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.raw.read(len(buffer))
+        buffer[:len(data)] = data
+        self.parts.append(data)
+        return len(data)
+
+    def text(self):
+        return b"".join(self.parts).decode("utf-8")
+
+
+class CatalogStore:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        for table, column, column_type in _MIGRATIONS:
+            existing = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        self.on_change = None
+
+    def _conn(self):
+        # Una conexión por hilo (Streamlit atiende cada sesión en un hilo distinto)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- LECTURAS ---
+
+    def read_products(self):
+        rows = self._conn().execute(
+            f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM products ORDER BY rowid"
+        ).fetchall()
+        df = pd.DataFrame.from_records(rows, columns=PRODUCT_COLUMNS)
+        df['price'] = pd.to_numeric(df['price']).fillna(0)
+        df['stock'] = pd.to_numeric(df['stock']).fillna(0).astype(int)
+        return df
+
+    def read_document(self, path):
+        row = self._conn().execute("SELECT content FROM documents WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def versions(self):
+        """{path: revisión} de todos los archivos en una sola consulta.
+
+        Es el canal de versiones de la tienda: cualquier escritura (del admin de esta o de
+        otra réplica, o un cambio traído de GitHub) incrementa la revisión del archivo,
+        así que comparar revisiones en cada rerun basta para saber qué recargar.
+        """
+        return dict(self._conn().execute("SELECT path, revision FROM sync_state").fetchall())
+
+    def has_data(self, path):
+        # Datos traídos de GitHub o copiados del checkout (sha conocido) al arrancar
+        row = self._conn().execute("SELECT synced_at, sha FROM sync_state WHERE path = ?", (path,)).fetchone()
+        return bool(row and (row[0] is not None or row[1] is not None))
+
+    def staleness(self, path):
+        """(segundos desde la última sincronización correcta o None, último error o None)."""
+        row = self._conn().execute(
+            "SELECT synced_at, last_error FROM sync_state WHERE path = ?", (path,)
+        ).fetchone()
+        if not row:
+            return None, None
+        synced_at, last_error = row
+        return (time.time() - synced_at if synced_at is not None else None), last_error
+
+    def sync_status(self):
+        """{path: {'pending': n, 'last_error': str|None, 'synced_at': ts|None, 'conflicts': [str],
+        'retry_at': ts|None}}"""
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT path, revision - synced_revision, last_error, synced_at, conflict, retry_at FROM sync_state"
+        ).fetchall()
+        status = {
+            path: {
+                "pending": pending,
+                "last_error": error,
+                "synced_at": synced_at,
+                "conflicts": json.loads(conflict) if conflict else [],
+                "retry_at": retry_at,
+            }
+            for path, pending, error, synced_at, conflict, retry_at in rows
+        }
+        staged = conn.execute("SELECT COUNT(*) FROM staged_files").fetchone()[0]
+        if staged or STAGED_KEY in status:
+            status.setdefault(STAGED_KEY, {"last_error": None, "synced_at": None, "conflicts": [], "retry_at": None})
+            status[STAGED_KEY]["pending"] = staged
+        return status
+
+    # --- ESCRITURAS LOCALES (se suben en segundo plano) ---
+
+    def _bump_revision(self, conn, path, message, local=True, changeset=None):
+        conn.execute("INSERT OR IGNORE INTO sync_state (path) VALUES (?)", (path,))
+        conn.execute("UPDATE sync_state SET revision = revision + 1 WHERE path = ?", (path,))
+        revision = conn.execute("SELECT revision FROM sync_state WHERE path = ?", (path,)).fetchone()[0]
+        if local:
+            conn.execute(
+                "INSERT INTO outbox (path, revision, message, created_at, changeset) VALUES (?, ?, ?, ?, ?)",
+                (path, revision, message, time.time(), changeset.to_json() if changeset else None),
+            )
+        else:
+            conn.execute("UPDATE sync_state SET synced_revision = ? WHERE path = ?", (revision, path))
+        return revision
+
+    def replace_products(self, df, commit_message):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM products")
+            conn.executemany(_INSERT_PRODUCT, _product_rows(df))
+            self._bump_revision(conn, PRODUCTS_PATH, commit_message)
+        self._notify()
+        return True
+
+    def apply_changes(self, changes, commit_message, files=None, documents=None):
+        """Aplica un ChangeSet como parche: solo se tocan las filas afectadas.
+
+        `files` ({ruta: bytes}, p. ej. la foto de un producto nuevo) y `documents`
+        ({ruta: texto}, p. ej. el manifiesto de imágenes) se guardan en la misma
+        transacción y se suben en el mismo commit que el CSV.
+        """
+        with self._conn() as conn:
+            # Transacción de escritura desde el principio: otra réplica podría asignar los mismos ids
+            conn.execute("BEGIN IMMEDIATE")
+            if files:
+                self._stage(conn, files, commit_message)
+            self._write_documents(conn, documents, commit_message)
+            if changes.deleted:
+                conn.executemany("DELETE FROM products WHERE id = ?", [(i,) for i in changes.deleted])
+            for row_id, values in changes.updated.items():
+                columns = [c for c in values if c in PRODUCT_COLUMNS and c != 'id']
+                if columns:
+                    conn.execute(
+                        f"UPDATE products SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?",
+                        [values[c] for c in columns] + [row_id],
+                    )
+            if changes.inserted:
+                next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM products").fetchone()[0]
+                # Las altas sin id reciben uno nuevo (queda registrado en el ChangeSet)
+                for i, row in enumerate(changes.inserted):
+                    if row.get('id') is None:
+                        changes.inserted[i] = row = dict(row, id=next_id)
+                    next_id = max(next_id, row['id'] + 1)
+                conn.executemany(
+                    _INSERT_PRODUCT,
+                    [tuple(row.get(c) for c in PRODUCT_COLUMNS) for row in changes.inserted],
+                )
+            self._bump_revision(conn, PRODUCTS_PATH, commit_message, changeset=changes)
+        logger.info("Inventario: %s (%s)", changes.summary(), commit_message)
+        self._notify()
+        return True
+
+    def _stage(self, conn, files, message):
+        conn.executemany(
+            "INSERT INTO staged_files (path, content, message, created_at) VALUES (?, ?, ?, ?)",
+            [(path, sqlite3.Binary(content), message, time.time()) for path, content in files.items()],
+        )
+
+    def stage_files(self, files, commit_message, documents=None):
+        """Encola archivos binarios ({ruta: bytes}) para el próximo commit."""
+        with self._conn() as conn:
+            self._stage(conn, files, commit_message)
+            self._write_documents(conn, documents, commit_message)
+        self._notify()
+        return True
+
+    def staged_files(self):
+        """[(seq, ruta, bytes, mensaje)] en orden de llegada; si una ruta se repite gana la última."""
+        return [
+            (seq, path, bytes(content), message)
+            for seq, path, content, message in self._conn().execute(
+                "SELECT seq, path, content, message FROM staged_files ORDER BY seq"
+            )
+        ]
+
+    def clear_staged(self, max_seq):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM staged_files WHERE seq <= ?", (max_seq,))
+            conn.execute("UPDATE sync_state SET last_error = NULL, retry_at = NULL WHERE path = ?", (STAGED_KEY,))
+
+    def _write_documents(self, conn, documents, message):
+        for path, content in (documents or {}).items():
+            conn.execute("INSERT OR REPLACE INTO documents (path, content) VALUES (?, ?)", (path, content))
+            self._bump_revision(conn, path, message)
+
+    def write_document(self, path, content, commit_message):
+        with self._conn() as conn:
+            self._write_documents(conn, {path: content}, commit_message)
+        self._notify()
+        return True
+
+    def _notify(self):
+        if self.on_change:
+            self.on_change()
+
+    # --- SOPORTE PARA LA SINCRONIZACIÓN ---
+
+    def _store_content(self, conn, path, content, incoming=False):
+        if path == PRODUCTS_PATH:
+            conn.execute("DELETE FROM products")
+            if incoming:
+                columns = ', '.join(PRODUCT_COLUMNS)
+                conn.execute(
+                    f"INSERT INTO products ({columns}) SELECT {columns} FROM products_incoming ORDER BY rowid"
+                )
+                conn.execute("DELETE FROM products_incoming")
+                return
+            with metrics.stage("sync.parse_products"):
+                for rows in iter_product_rows(content):
+                    conn.executemany(_INSERT_PRODUCT, rows)
+        else:
+            conn.execute("INSERT OR REPLACE INTO documents (path, content) VALUES (?, ?)", (path, content))
+
+    def serialize(self, path):
+        if path == PRODUCTS_PATH:
+            return self.read_products().to_csv(index=False)
+        return self.read_document(path)
+
+    def has_pending(self):
+        """Hay algo para subir (escrito por este proceso o por otra réplica)."""
+        conn = self._conn()
+        return bool(
+            conn.execute("SELECT 1 FROM sync_state WHERE revision > synced_revision LIMIT 1").fetchone()
+            or conn.execute("SELECT 1 FROM staged_files LIMIT 1").fetchone()
+        )
+
+    def pending_paths(self):
+        rows = self._conn().execute(
+            "SELECT path FROM sync_state WHERE revision > synced_revision"
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def snapshot_for_push(self, path):
+        """(revision, sha, contenido, mensajes) leídos en una misma transacción."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            revision, sha = conn.execute(
+                "SELECT revision, sha FROM sync_state WHERE path = ?", (path,)
+            ).fetchone()
+            content = self.serialize(path)
+            messages = [r[0] for r in conn.execute(
+                "SELECT message FROM outbox WHERE path = ? AND revision <= ? ORDER BY seq", (path, revision)
+            ) if r[0]]
+        return revision, sha, content, messages
+
+    def mark_pushed(self, path, revision, sha, content):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE sync_state SET sha = ?, etag = NULL, synced_revision = MAX(synced_revision, ?), "
+                "base = ?, last_error = NULL, retry_at = NULL, synced_at = ? WHERE path = ?",
+                (sha, revision, content, time.time(), path),
+            )
+            conn.execute("DELETE FROM outbox WHERE path = ? AND revision <= ?", (path, revision))
+
+    def mark_error(self, path, error, retry_at=None):
+        with self._conn() as conn:
+            conn.execute("INSERT OR IGNORE INTO sync_state (path) VALUES (?)", (path,))
+            conn.execute(
+                "UPDATE sync_state SET last_error = ?, retry_at = COALESCE(?, retry_at) WHERE path = ?",
+                (str(error), retry_at, path),
+            )
+
+    def remote_state(self, path):
+        row = self._conn().execute("SELECT sha, etag FROM sync_state WHERE path = ?", (path,)).fetchone()
+        return row if row else (None, None)
+
+    def apply_remote(self, path, content, sha, etag, synced=True, incoming=False):
+        """Reemplaza la copia local con la versión remota (solo si no hay cambios locales pendientes).
+
+        Con `synced=False` (copia del checkout al arrancar) no cuenta como sincronización con GitHub.
+        Con `incoming=True` los productos ya están en products_incoming (apply_remote_stream).
+        """
+        with self._conn() as conn:
+            conn.execute("INSERT OR IGNORE INTO sync_state (path) VALUES (?)", (path,))
+            pending = conn.execute(
+                "SELECT revision > synced_revision FROM sync_state WHERE path = ?", (path,)
+            ).fetchone()[0]
+            if pending:
+                return False
+            self._store_content(conn, path, content, incoming)
+            self._bump_revision(conn, path, None, local=False)
+            conn.execute(
+                "UPDATE sync_state SET sha = ?, etag = ?, base = ?, last_error = NULL, synced_at = ? "
+                "WHERE path = ?",
+                (sha, etag, content, time.time() if synced else None, path),
+            )
+        return True
+
+    def apply_remote_stream(self, stream, sha, etag):
+        """apply_remote para products.csv leído en streaming (archivos grandes). Las filas se
+        cargan por bloques en products_incoming, así la memoria no crece con el catálogo y la
+        descarga no retiene el lock de escritura; al terminar se publican de una vez."""
+        recording = _RecordingStream(stream)
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM products_incoming")
+        with metrics.stage("sync.parse_products"):
+            for rows in iter_product_rows(io.BufferedReader(recording)):
+                with conn:
+                    conn.executemany(_INSERT_INCOMING, rows)
+        return self.apply_remote(PRODUCTS_PATH, recording.text(), sha, etag, incoming=True)
+
+    def mark_checked(self, path, etag=None):
+        with self._conn() as conn:
+            conn.execute("INSERT OR IGNORE INTO sync_state (path) VALUES (?)", (path,))
+            conn.execute(
+                "UPDATE sync_state SET etag = COALESCE(?, etag), last_error = NULL, synced_at = ? WHERE path = ?",
+                (etag, time.time(), path),
+            )
+
+
+    # --- CONFLICTOS DE SHA (OTRA INSTANCIA O ADMIN SUBIÓ CAMBIOS) ---
+
+    def base_content(self, path):
+        row = self._conn().execute("SELECT base FROM sync_state WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def has_conflict(self, path):
+        row = self._conn().execute("SELECT conflict FROM sync_state WHERE path = ?", (path,)).fetchone()
+        return bool(row and row[0])
+
+    def rebase(self, path, expected_revision, merged_content, remote_sha, remote_content):
+        """Guarda el resultado del merge sobre la versión remota, que pasa a ser la nueva base.
+
+        Los cambios siguen pendientes de subir. Devuelve False si hubo una escritura local
+        después de `expected_revision` (hay que volver a combinar).
+        """
+        with self._conn() as conn:
+            revision = conn.execute("SELECT revision FROM sync_state WHERE path = ?", (path,)).fetchone()[0]
+            if revision != expected_revision:
+                return False
+            self._store_content(conn, path, merged_content)
+            conn.execute(
+                "UPDATE sync_state SET revision = revision + 1, sha = ?, etag = NULL, base = ? WHERE path = ?",
+                (remote_sha, remote_content, path),
+            )
+        return True
+
+    def mark_conflict(self, path, conflicts, remote_sha, remote_content):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE sync_state SET conflict = ?, conflict_sha = ?, conflict_content = ?, last_error = ? "
+                "WHERE path = ?",
+                (json.dumps(conflicts, ensure_ascii=False), remote_sha, remote_content,
+                 f"Conflicto con cambios hechos en GitHub ({len(conflicts)})", path),
+            )
+
+    def resolve_conflict(self, path, keep_local):
+        """Resuelve un conflicto: conservar los cambios locales (se combinan sobre la versión
+        remota) o descartarlos y quedarse con la versión de GitHub.
+
+        Devuelve False si no había conflicto o si hubo otra escritura local mientras tanto.
+        """
+        row = self._conn().execute(
+            "SELECT conflict_sha, conflict_content, base, revision FROM sync_state WHERE path = ?", (path,)
+        ).fetchone()
+        if not row or row[1] is None:
+            return False
+        remote_sha, remote_content, base, revision = row
+        if keep_local:
+            # Lo local gana solo en las celdas en conflicto: el resto de lo que cambió en
+            # GitHub se conserva
+            merged, _ = merge_content(path, base, self.serialize(path), remote_content, prefer_local=True)
+            if not self.rebase(path, revision, merged, remote_sha, remote_content):
+                return False
+        with self._conn() as conn:
+            if not keep_local:
+                self._store_content(conn, path, remote_content)
+                conn.execute("DELETE FROM outbox WHERE path = ?", (path,))
+                conn.execute(
+                    "UPDATE sync_state SET revision = revision + 1, synced_revision = revision + 1, "
+                    "sha = ?, etag = NULL, base = ?, synced_at = ? WHERE path = ?",
+                    (remote_sha, remote_content, time.time(), path),
+                )
+            conn.execute(
+                "UPDATE sync_state SET conflict = NULL, conflict_sha = NULL, conflict_content = NULL, "
+                "last_error = NULL WHERE path = ?",
+                (path,),
+            )
+        self._notify()
+        return True
+
+
+def merge_content(path, base, local, remote, prefer_local=False):
+    """Merge de tres vías del contenido de un archivo. Devuelve (contenido, conflictos).
+
+    Con `prefer_local=True` (el admin eligió conservar sus cambios) los conflictos se
+    resuelven a favor de lo local y siempre hay contenido.
+    """
+    if local == base or local == remote:
+        return remote, []
+    if remote == base:
+        return local, []
+    if path == MANIFEST_PATH:
+        # Sin base (lo crearon dos instancias a la vez) se combina contra un manifiesto vacío
+        merged = changesets.merge_dicts(
+            image_store.load_manifest(base), image_store.load_manifest(local), image_store.load_manifest(remote)
+        )
+        return image_store.dump_manifest(merged), []
+    if base is None:
+        if prefer_local:
+            return local, []
+        return None, [f"{path}: no hay versión base para combinar los cambios."]
+    if path == PRODUCTS_PATH:
+        merged, conflicts = changesets.merge_products(
+            parse_products_csv(base), parse_products_csv(local), parse_products_csv(remote),
+            prefer_local=prefer_local,
+        )
+        return (merged.to_csv(index=False) if merged is not None else None), conflicts
+    if path == CATEGORIES_PATH:
+        merged = changesets.merge_categories(json.loads(base), json.loads(local), json.loads(remote))
+        return json.dumps(merged, indent=4, ensure_ascii=False), []
+    if prefer_local:
+        return local, []
+    return None, [f"{path}: modificado aquí y en GitHub."]
+
+
+class GitHubSync(threading.Thread):
+    """Hilo que sube los cambios locales pendientes y trae los cambios remotos."""
+
+    def __init__(self, store, paths=(PRODUCTS_PATH,) + DOCUMENT_PATHS, interval=SYNC_INTERVAL):
+        super().__init__(name="catalog-github-sync", daemon=True)
+        self.store = store
+        self.paths = paths
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._lock_file = None
+        # Peticiones que descuenta una vuelta de consultas (promedio móvil; las 304 no cuentan)
+        self.pull_cost = float(len(paths))
+        # Subidas fallidas seguidas y cuándo se puede volver a intentar
+        self.push_failures = 0
+        self.retry_at = 0.0
+        # Un hilo por archivo: una vuelta de consultas tarda lo que la más lenta, no la suma.
+        # Los hilos se reutilizan (cada uno conserva su conexión SQLite).
+        self._pull_pool = ThreadPoolExecutor(max_workers=len(paths), thread_name_prefix="catalog-pull")
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+    def is_leader(self):
+        """True si este proceso es el que sincroniza la base con GitHub.
+
+        El lock (flock) lo libera el sistema si el proceso muere, y otra réplica lo toma
+        en su siguiente vuelta.
+        """
+        if fcntl is None:
+            return True
+        if self._lock_file is None:
+            self._lock_file = open(f"{self.store.db_path}.sync-lock", "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def run(self):
+        next_pull = 0.0
+        while not self._stop_event.is_set():
+            # Vueltas cortas: los cambios que escriben otras réplicas no nos despiertan
+            woke = self._wake.wait(PUSH_DELAY)
+            if self._stop_event.is_set():
+                break
+            if woke:
+                # Agrupar ediciones seguidas en un solo commit
+                time.sleep(PUSH_DELAY)
+                self._wake.clear()
+            if not self.is_leader():
+                continue
+            try:
+                budget = github_client.budget
+                pushed = self.store.has_pending() and time.time() >= self.retry_at and self.push_pending()
+                # Con poca cuota solo se consulta al vencer el intervalo (estirado), no tras cada guardado
+                if time.time() >= next_pull or ((pushed or woke) and not budget.is_low()):
+                    self.pull_scheduled()
+                    next_pull = time.time() + budget.stretch(self.interval, self.pull_cost)
+            except Exception:
+                logger.exception("Error inesperado sincronizando con GitHub")
+
+    def pull_async(self, paths):
+        """Lanza la consulta de `paths` en paralelo. Devuelve {path: Future}."""
+        return {path: self._pull_pool.submit(self.pull, path) for path in paths}
+
+    def pull_all(self, paths=None):
+        with metrics.stage("sync.pull_all"):
+            return {path: future.result() for path, future in self.pull_async(paths or self.paths).items()}
+
+    def pull_scheduled(self):
+        """Vuelta de consultas según la cuota del token: con poca, solo URGENT_PATHS; sin
+        cuota fuera de la reserva, ninguna (se sigue sirviendo la copia local)."""
+        budget = github_client.budget
+        paths = [p for p in self.paths if p in URGENT_PATHS] if budget.is_low() else list(self.paths)
+        if not paths or not budget.allows(len(paths)):
+            metrics.count("sync.pulls_deferred", len(self.paths))
+            return {}
+        metrics.count("sync.pulls_deferred", len(self.paths) - len(paths))
+
+        before = (budget.remaining, budget.reset_at)
+        results = self.pull_all(paths)
+        if before[0] is not None and budget.reset_at == before[1]:
+            # Lo que gastan otros usos del token ya se ve en `remaining`: aquí solo lo propio
+            spent = min(max(before[0] - budget.remaining, 0), len(paths))
+            self.pull_cost = 0.7 * self.pull_cost + 0.3 * spent
+        return results
+
+    def push_pending(self):
+        """Sube en un único commit (Git Data API) los archivos con cambios locales y las
+        imágenes en cola. Devuelve True si se creó el commit."""
+        # Los archivos en conflicto esperan a que un admin elija qué versión conservar
+        paths = [p for p in self.store.pending_paths() if not self.store.has_conflict(p)]
+        staged = self.store.staged_files()
+        if not paths and not staged:
+            return False
+
+        for attempt in range(MAX_MERGE_ATTEMPTS + 1):
+            snapshots = {}
+            for path in paths:
+                revision, sha, content, messages = self.store.snapshot_for_push(path)
+                if content is not None:
+                    snapshots[path] = (revision, sha, content, messages)
+            if not snapshots and not staged:
+                return False
+
+            files = {path: content for _, path, content, _ in staged}
+            files.update({path: snap[2].encode("utf-8") for path, snap in snapshots.items()})
+            messages = [m for _, _, _, m in staged if m]
+            for snap in snapshots.values():
+                messages += snap[3]
+            # Sin duplicados (una foto y su producto comparten mensaje)
+            message = " | ".join(dict.fromkeys(messages)) or "Actualización de la tienda"
+
+            # Sin cuota para el lote entero (un blob por archivo) los cambios quedan en cola
+            # hasta el reset: no se pierden ni se reintentan en vano
+            if not github_client.budget.allows(github_client.commit_cost(len(files), snapshots), write=True):
+                return False
+
+            try:
+                with metrics.stage("sync.commit"):
+                    result = github_client.commit_files(
+                        files, message, expected_shas={path: snap[1] for path, snap in snapshots.items()}
+                    )
+            except github_client.StaleFilesError as e:
+                if attempt == MAX_MERGE_ATTEMPTS:
+                    self._push_failed(list(snapshots) or [STAGED_KEY], e)
+                    return False
+                # Otro admin o instancia cambió esos archivos: combinar y reintentar el commit
+                for path in e.paths:
+                    try:
+                        merged = self.merge_remote(path, snapshots[path][0])
+                    except Exception as merge_error:
+                        self._push_failed([path], merge_error)
+                        merged = False
+                    if not merged:
+                        paths.remove(path)
+                continue
+            except Exception as e:
+                logger.warning("No se pudo crear el commit: %s", e)
+                self._push_failed(list(snapshots) + ([STAGED_KEY] if staged else []), e)
+                return False
+
+            for path, (revision, _, content, _) in snapshots.items():
+                self.store.mark_pushed(path, revision, result["blobs"][path], content)
+            if staged:
+                self.store.clear_staged(staged[-1][0])
+            self.push_failures = 0
+            self.retry_at = 0.0
+            return True
+        return False
+
+    def _push_failed(self, paths, error):
+        """Registra el error y aplaza el próximo intento de subida (backoff exponencial)."""
+        self.push_failures += 1
+        delay = min(PUSH_RETRY_MAX, PUSH_RETRY_MIN * 2 ** (self.push_failures - 1))
+        self.retry_at = time.time() + delay
+        logger.info("Próximo intento de subida en %d s (fallo %d seguido)", delay, self.push_failures)
+        for path in paths:
+            self.store.mark_error(path, error, self.retry_at)
+
+    def merge_remote(self, path, revision):
+        """Trae la versión remota y combina los cambios locales sobre ella."""
+        response = github_client.get_contents(path)
+        response.raise_for_status()
+        file_info = response.json()
+        remote_sha = file_info.get("sha")
+        remote = github_client.read_content(file_info).decode("utf-8")
+
+        merged, conflicts = merge_content(path, self.store.base_content(path), self.store.serialize(path), remote)
+        if conflicts:
+            logger.warning("Conflicto en %s: %s", path, conflicts)
+            self.store.mark_conflict(path, conflicts, remote_sha, remote)
+            return False
+        # Si hubo otra escritura local mientras tanto, el próximo intento vuelve a combinar
+        self.store.rebase(path, revision, merged, remote_sha, remote)
+        return True
+
+    def pull(self, path):
+        if path in self.store.pending_paths():
+            return False
+        sha, etag = self.store.remote_state(path)
+        try:
+            response = github_client.get_contents(path, etag=etag)
+            if response.status_code == 304:
+                self.store.mark_checked(path)
+                return False
+            if response.status_code == 404 and sha is None:
+                # Todavía no existe en el repo (p. ej. el manifiesto antes de la primera foto)
+                self.store.mark_checked(path)
+                return False
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning("No se pudo leer %s: %s", path, e)
+            self.store.mark_error(path, e)
+            return False
+
+        file_info = response.json()
+        new_etag = response.headers.get("ETag")
+        if file_info.get("sha") == sha:
+            self.store.mark_checked(path, new_etag)
+            return False
+        try:
+            if path == PRODUCTS_PATH and not github_client.has_inline_content(file_info):
+                # Más de 1 MB: la API de contenidos no trae el archivo; se parsea mientras llega del blob
+                with github_client.open_blob(file_info["sha"]) as blob:
+                    return self.store.apply_remote_stream(blob.raw, file_info.get("sha"), new_etag)
+            content = github_client.read_content(file_info).decode("utf-8")
+        except Exception as e:
+            logger.warning("No se pudo descargar %s: %s", path, e)
+            self.store.mark_error(path, e)
+            return False
+        return self.store.apply_remote(path, content, file_info.get("sha"), new_etag)
+
+
+def seed_from_checkout(store, path):
+    """Carga en el store la copia de `path` del checkout local con su SHA de blob.
+
+    No hay ETag para esta copia, así que la primera consulta a GitHub no es condicional:
+    trae la metadata (y el contenido si pesa menos de 1 MB) y deja guardado el ETag para
+    las siguientes, que ya responden 304. Si el SHA coincide no se reescribe nada (las
+    caches de la tienda siguen valiendo) y un products.csv grande no se baja del blob.
+    """
+    if not os.path.exists(path):
+        return False
+    with open(path, "rb") as f:
+        content = f.read()
+    try:
+        return store.apply_remote(path, content.decode("utf-8"), github_client.blob_sha(content), None, synced=False)
+    except Exception as e:
+        logger.warning("No se pudo cargar %s del checkout: %s", path, e)
+        return False
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Store del proceso con su hilo de sincronización (se crea en el primer uso)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = CatalogStore()
+                sync = GitHubSync(store)
+                store.on_change = sync.notify
+                store.sync = sync
+                # Primer arranque sin datos locales: se sirve la versión del checkout (la del
+                # último deploy). Solo se espera a GitHub si no hay productos en disco.
+                missing = [p for p in sync.paths if not store.has_data(p) and not seed_from_checkout(store, p)]
+                if PRODUCTS_PATH in missing:
+                    # Todo se pide a la vez (también el manifiesto de imágenes), pero solo se
+                    # espera a los productos: categorías y tema llegan mientras la página se dibuja
+                    sync.pull_async(missing)[PRODUCTS_PATH].result()
+                # La primera vuelta del hilo ya consulta GitHub, sin esperar el intervalo
+                sync.start()
+                _store = store
+    return _store
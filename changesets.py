@@ -0,0 +1,201 @@
+# changesets.py
+# Cambios mínimos (altas, modificaciones y bajas por fila) entre dos versiones del
+# inventario. El panel admin guarda un ChangeSet en lugar del DataFrame completo, el
+# store local lo aplica como un parche y lo registra junto al commit pendiente.
+
+import json
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+KEY_COLUMN = 'id'
+
+
+def clean_value(value):
+    """Valor serializable a JSON / sqlite3: NaN -> None, numpy -> tipos nativos."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def clean_frame(df):
+    """clean_value para un DataFrame entero, por columna (sin recorrer celda por celda)."""
+    df = df.astype(object)
+    return df.where(df.notna(), None)
+
+
+@dataclass
+class ChangeSet:
+    inserted: list = field(default_factory=list)   # filas completas (dict)
+    updated: dict = field(default_factory=dict)    # id -> {columna: valor nuevo}
+    deleted: list = field(default_factory=list)    # ids
+
+    def is_empty(self):
+        return not (self.inserted or self.updated or self.deleted)
+
+    def summary(self):
+        parts = []
+        if self.inserted:
+            parts.append(f"{len(self.inserted)} alta(s)")
+        if self.updated:
+            parts.append(f"{len(self.updated)} modificación(es)")
+        if self.deleted:
+            parts.append(f"{len(self.deleted)} baja(s)")
+        return ", ".join(parts) if parts else "sin cambios"
+
+    def to_json(self):
+        return json.dumps({
+            "inserted": self.inserted,
+            "updated": {str(k): v for k, v in self.updated.items()},
+            "deleted": self.deleted,
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(
+            inserted=data.get("inserted", []),
+            updated={int(k): v for k, v in data.get("updated", {}).items()},
+            deleted=data.get("deleted", []),
+        )
+
+
+def diff_products(before, after, key=KEY_COLUMN):
+    """ChangeSet que lleva de `before` a `after`, comparando filas por `key`.
+
+    Devuelve None si los ids no son únicos (no se puede diferenciar fila a fila).
+    """
+    if not (before[key].is_unique and after[key].dropna().is_unique):
+        return None
+
+    columns = [c for c in after.columns if c != key]
+    old = before.set_index(key)
+    new_rows = after[after[key].notna()]
+    new = new_rows.set_index(key)
+
+    changes = ChangeSet()
+
+    # Filas sin id (p. ej. agregadas en el editor) son altas
+    for row in after[after[key].isna()].to_dict("records"):
+        changes.inserted.append({k: clean_value(v) for k, v in row.items()})
+    for row_id in new.index.difference(old.index):
+        row = {key: clean_value(row_id)}
+        row.update({c: clean_value(new.at[row_id, c]) for c in columns})
+        changes.inserted.append(row)
+
+    changes.deleted = [clean_value(i) for i in old.index.difference(new.index)]
+
+    common = old.index.intersection(new.index)
+    shared_columns = [c for c in columns if c in old.columns]
+    if len(common) and shared_columns:
+        a = old.loc[common, shared_columns].astype(object)
+        b = new.loc[common, shared_columns].astype(object)
+        # Se comparan como objetos: NaN == NaN cuenta como igual
+        different = ~((a == b) | (a.isna() & b.isna()))
+        for row_id in different.index[different.any(axis=1)]:
+            changed_columns = different.columns[different.loc[row_id]]
+            changes.updated[clean_value(row_id)] = {c: clean_value(b.at[row_id, c]) for c in changed_columns}
+
+    return changes
+
+
+def apply_changes(df, changes, key=KEY_COLUMN):
+    """Devuelve una copia de `df` con el ChangeSet aplicado (mismo orden de filas)."""
+    result = df[~df[key].isin(changes.deleted)].copy()
+    if changes.updated:
+        positions = {row_id: i for i, row_id in enumerate(result[key].tolist())}
+        for row_id, values in changes.updated.items():
+            if row_id not in positions:
+                continue
+            for column, value in values.items():
+                if column in result.columns:
+                    result.iat[positions[row_id], result.columns.get_loc(column)] = value
+    if changes.inserted:
+        inserted = pd.DataFrame(changes.inserted).reindex(columns=result.columns)
+        result = pd.concat([result, inserted], ignore_index=True)
+    return result.reset_index(drop=True)
+
+
+def merge_products(base, local, remote, key=KEY_COLUMN, prefer_local=False):
+    """Merge de tres vías del inventario.
+
+    Aplica sobre `remote` los cambios hechos localmente desde `base`. Devuelve
+    (DataFrame combinado, []) o (None, [descripción de cada conflicto]). Solo hay
+    conflicto cuando ambos lados cambiaron la misma celda a valores distintos, o
+    cuando un lado modificó una fila que el otro eliminó.
+
+    Con `prefer_local=True` los conflictos se resuelven a favor de lo local (celda por
+    celda; una fila modificada aquí y eliminada en GitHub vuelve a agregarse) y se
+    devuelve (DataFrame combinado, [conflictos resueltos]).
+    """
+    ours = diff_products(base, local, key)
+    theirs = diff_products(base, remote, key)
+    if ours is None or theirs is None:
+        return None, ["Hay ids repetidos en el inventario: no se puede combinar fila a fila."]
+
+    conflicts = []
+    theirs_deleted = set(theirs.deleted)
+    for row_id, values in ours.updated.items():
+        if row_id in theirs_deleted:
+            conflicts.append(f"Producto {row_id}: modificado aquí y eliminado en GitHub.")
+            continue
+        remote_values = theirs.updated.get(row_id, {})
+        for column, value in values.items():
+            if column in remote_values and remote_values[column] != value:
+                conflicts.append(
+                    f"Producto {row_id}, '{column}': aquí '{value}', en GitHub '{remote_values[column]}'."
+                )
+    for row_id in ours.deleted:
+        if row_id in theirs.updated:
+            conflicts.append(f"Producto {row_id}: eliminado aquí y modificado en GitHub.")
+    if conflicts and not prefer_local:
+        return None, conflicts
+    for row_id in [r for r in ours.updated if r in theirs_deleted]:
+        del ours.updated[row_id]
+        local_row = local[local[key] == row_id].iloc[0]
+        ours.inserted.append({c: clean_value(v) for c, v in local_row.items()})
+
+    # Altas locales cuyo id ya usa otra alta remota: se les asigna un id nuevo
+    remote_ids = set(remote[key].dropna().tolist())
+    next_id = int(max(remote_ids | set(local[key].dropna().tolist()) | {0})) + 1
+    inserted = []
+    for row in ours.inserted:
+        if row.get(key) is None or row[key] in remote_ids:
+            row = dict(row, **{key: next_id})
+            next_id += 1
+        inserted.append(row)
+    ours.inserted = inserted
+
+    return apply_changes(remote, ours, key), conflicts
+
+
+def merge_categories(base, local, remote):
+    """Merge de tres vías de categories.json ({línea: [tipos]}): aplica sobre `remote`
+    las líneas y tipos agregados o quitados localmente desde `base`. No genera conflictos."""
+    merged = {main: list(subs) for main, subs in remote.items()}
+    for main, subs in local.items():
+        base_subs = base.get(main, [])
+        added = [s for s in subs if s not in base_subs]
+        removed = [s for s in base_subs if s not in subs]
+        if main not in base and main not in merged:
+            merged[main] = []
+        if main in merged:
+            merged[main] = [s for s in merged[main] if s not in removed]
+            merged[main] += [s for s in added if s not in merged[main]]
+    for main in base:
+        if main not in local:
+            merged.pop(main, None)
+    return merged
+
+
+def merge_dicts(base, local, remote):
+    """Merge de tres vías de un diccionario plano (p. ej. el manifiesto de imágenes):
+    claves agregadas o quitadas localmente desde `base` se aplican sobre `remote`."""
+    merged = dict(remote)
+    for key, value in local.items():
+        if key not in base or base[key] != value:
+            merged[key] = value
+    for key in base:
+        if key not in local:
+            merged.pop(key, None)
+    return merged
@@ -0,0 +1,348 @@
+# github_client.py
+# Cliente HTTP compartido por la tienda (main.py) y el panel admin (pages/_admin.py)
+# para la API de contenidos de GitHub: una sola sesión con pool de conexiones
+# keep-alive, cabeceras y timeout por defecto, y reintentos con backoff. Cada
+# respuesta actualiza `budget`, la cuota por hora que le queda al token.
+
+import os
+import time
+import base64
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+load_dotenv()
+
+import metrics
+
+# --- CONFIGURACIÓN ---
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+GITHUB_REPO = os.getenv("GITHUB_REPO")
+GITHUB_BRANCH = os.getenv("GITHUB_BRANCH") if os.getenv("GITHUB_BRANCH") else "main"
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+TIMEOUT_API = 10
+
+# Reintentos ante 5xx / 429 (backoff exponencial, respetando Retry-After), solo para
+# lecturas: un PUT/POST/PATCH con 5xx puede haberse aplicado igual y repetirlo a ciegas
+# duplicaría el commit. Las escrituras solo se repiten ante un 429 con Retry-After
+# (GitHub no las procesó); ver request().
+RETRY_METHODS = frozenset(["GET", "HEAD"])
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+# Límite secundario de GitHub: responde 403 con Retry-After. No esperamos más que esto.
+MAX_RATE_LIMIT_WAIT = 30
+# Blobs subidos a la vez en un commit con varias fotos (GitHub penaliza la concurrencia alta)
+BLOB_WORKERS = 4
+# Cuota del token (límite primario, por hora) que las lecturas en segundo plano no tocan:
+# queda para que los guardados del admin siempre puedan subir
+RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_RESERVE", "200"))
+# Por debajo de esta fracción de la cuota, la sincronización se espacia
+RATE_LIMIT_LOW = 0.25
+# Peticiones fijas de un commit (ref, commit base, árbol, commit, actualizar ref); cada
+# archivo suma un blob (ver commit_cost)
+COMMIT_REQUESTS = 5
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Devuelve la sesión compartida (se crea una sola vez por proceso)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=MAX_RETRIES,
+                    backoff_factor=BACKOFF_FACTOR,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=RETRY_METHODS,
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                # Streamlit atiende cada sesión en su propio hilo: el pool debe admitir varias
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({
+                    "Authorization": f"token {GITHUB_TOKEN}",
+                    "Accept": "application/vnd.github.v3+json",
+                })
+                _session = session
+    return _session
+
+
+class RateBudget:
+    """Cuota restante del token según las cabeceras X-RateLimit-* de las respuestas.
+
+    Las respuestas 304 (peticiones condicionales) no descuentan cuota en GitHub.
+    """
+
+    def __init__(self, reserve=RATE_LIMIT_RESERVE, low=RATE_LIMIT_LOW):
+        self.reserve = reserve
+        self.low = low
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        if headers.get("X-RateLimit-Resource", "core") != "core":
+            return
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_at = float(headers["X-RateLimit-Reset"])
+            limit = int(headers.get("X-RateLimit-Limit", remaining))
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            # Las respuestas de hilos paralelos llegan desordenadas: dentro de una misma
+            # ventana vale el menor restante
+            if self.reset_at is None or reset_at > self.reset_at:
+                self.remaining = remaining
+            elif reset_at == self.reset_at:
+                self.remaining = min(self.remaining, remaining)
+            else:
+                return
+            self.limit = limit
+            self.reset_at = reset_at
+
+    def _known(self, now):
+        return self.remaining is not None and now < self.reset_at
+
+    def seconds_to_reset(self, now=None):
+        now = time.time() if now is None else now
+        return max(0.0, self.reset_at - now) if self._known(now) else 0.0
+
+    def allows(self, cost=1, write=False, now=None):
+        """True si quedan `cost` peticiones; las lecturas (write=False) no usan la reserva."""
+        now = time.time() if now is None else now
+        if not self._known(now):
+            return True
+        return self.remaining - cost >= (0 if write else self.reserve)
+
+    def is_low(self, now=None):
+        now = time.time() if now is None else now
+        return self._known(now) and self.remaining < self.limit * self.low
+
+    def stretch(self, interval, cost=1, now=None):
+        """Intervalo entre consultas (de `cost` peticiones) para que la cuota fuera de la
+        reserva alcance hasta el próximo reset. Con cuota de sobra devuelve `interval`."""
+        now = time.time() if now is None else now
+        if not self.is_low(now):
+            return interval
+        spare = self.remaining - self.reserve
+        to_reset = self.seconds_to_reset(now)
+        if spare <= 0:
+            return max(interval, to_reset)
+        # Nunca más allá del reset: ahí la cuota vuelve a estar completa
+        return max(interval, min(to_reset, to_reset * max(cost, 1) / spare))
+
+    def snapshot(self):
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reserve": self.reserve,
+            "reset_in": round(self.seconds_to_reset()),
+            "low": self.is_low(),
+        }
+
+
+budget = RateBudget()
+
+
+def _is_secondary_rate_limit(response):
+    if response.status_code != 403:
+        return False
+    if "Retry-After" in response.headers:
+        return True
+    return "secondary rate limit" in response.text.lower()
+
+
+def _must_wait(method, response):
+    """Respuestas que GitHub rechazó sin procesar y que se pueden repetir tras esperar."""
+    if _is_secondary_rate_limit(response):
+        return True
+    # Las lecturas ya las reintentó urllib3; las escrituras solo con Retry-After explícito
+    return (
+        response.status_code == 429
+        and "Retry-After" in response.headers
+        and method.upper() not in RETRY_METHODS
+    )
+
+
+def request(method, url, **kwargs):
+    """Petición a la API con timeout por defecto y espera ante el límite secundario (y 429)."""
+    kwargs.setdefault("timeout", TIMEOUT_API)
+    session = get_session()
+
+    for attempt in range(MAX_RETRIES + 1):
+        with metrics.stage(f"github.{method.lower()}"):
+            response = session.request(method, url, **kwargs)
+        budget.update(response.headers)
+        metrics.count("github.requests")
+        metrics.count(f"github.status.{response.status_code}")
+        # Bytes como viajan (comprimidos) y sin leer el cuerpo: también sirve para los streams
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit():
+            metrics.count("github.bytes_in", int(length))
+        if not _must_wait(method, response) or attempt == MAX_RETRIES:
+            return response
+        wait = response.headers.get("Retry-After")
+        wait = float(wait) if wait and wait.isdigit() else BACKOFF_FACTOR * (2 ** attempt) * 10
+        # Se descarta esta respuesta: con stream=True, sin close() la conexión no vuelve al pool
+        response.close()
+        time.sleep(min(wait, MAX_RATE_LIMIT_WAIT))
+    return response
+
+
+# --- API DE CONTENIDOS ---
+
+def contents_url(path):
+    return f"{GITHUB_API_URL}/repos/{GITHUB_REPO}/contents/{path}"
+
+
+def get_contents(path, etag=None):
+    """GET de un archivo. Si se pasa `etag`, la petición es condicional (puede devolver 304)."""
+    headers = {"If-None-Match": etag} if etag else None
+    return request("GET", contents_url(path), headers=headers, params={"ref": GITHUB_BRANCH})
+
+
+def blob_sha(content):
+    """SHA de blob de git para `content` (bytes): el mismo que reporta la API para ese archivo."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def decode_content(file_info):
+    """Decodifica el campo `content` (base64 con saltos de línea) de la API de contenidos."""
+    return base64.b64decode(file_info["content"].replace("\n", ""))
+
+
+def has_inline_content(file_info):
+    """False para archivos de más de 1 MB: la API de contenidos los informa (sha, size)
+    pero sin contenido (encoding "none"), que hay que pedir al blob."""
+    return file_info.get("encoding") == "base64"
+
+
+def open_blob(sha):
+    """Respuesta en streaming con los bytes crudos del blob `sha` (sin JSON ni base64,
+    hasta 100 MB). Usarla con `with` para liberar la conexión."""
+    response = request(
+        "GET", git_url(f"blobs/{sha}"), headers={"Accept": "application/vnd.github.raw+json"}, stream=True
+    )
+    response.raise_for_status()
+    response.raw.decode_content = True
+    return response
+
+
+def read_content(file_info):
+    """Bytes de un archivo de la API de contenidos, también si supera 1 MB."""
+    if has_inline_content(file_info):
+        return decode_content(file_info)
+    with open_blob(file_info["sha"]) as response:
+        return response.content
+
+
+# --- GIT DATA API: VARIOS ARCHIVOS EN UN SOLO COMMIT ---
+
+class StaleFilesError(Exception):
+    """Algún archivo cambió en la rama respecto del SHA esperado (lo modificó otra persona)."""
+
+    def __init__(self, paths):
+        super().__init__(f"Archivos modificados en GitHub: {', '.join(paths)}")
+        self.paths = paths
+
+
+def git_url(endpoint):
+    return f"{GITHUB_API_URL}/repos/{GITHUB_REPO}/git/{endpoint}"
+
+
+def _json_or_raise(response):
+    response.raise_for_status()
+    return response.json()
+
+
+def create_blob(content):
+    """Sube `content` (bytes) como blob y devuelve su SHA."""
+    blob = _json_or_raise(request("POST", git_url("blobs"), json={
+        "content": base64.b64encode(content).decode("utf-8"),
+        "encoding": "base64",
+    }))
+    return blob["sha"]
+
+
+def _blob_sha_at(tree_sha, path, trees):
+    """SHA del blob en `path` dentro del árbol `tree_sha` (None si no existe)."""
+    *dirs, file_name = path.split("/")
+    for name in dirs + [file_name]:
+        if tree_sha not in trees:
+            listing = _json_or_raise(request("GET", git_url(f"trees/{tree_sha}")))
+            trees[tree_sha] = {entry["path"]: entry["sha"] for entry in listing["tree"]}
+        tree_sha = trees[tree_sha].get(name)
+        if tree_sha is None:
+            return None
+    return tree_sha
+
+
+def commit_cost(n_files, checked_paths=()):
+    """Peticiones que gasta un intento de commit_files: las fijas, un blob por archivo y
+    los árboles que se listan para comprobar el SHA de `checked_paths`."""
+    trees = set()
+    for path in checked_paths:
+        dirs = path.split("/")[:-1]
+        trees.update("/".join(dirs[:depth]) for depth in range(len(dirs) + 1))
+    return COMMIT_REQUESTS + n_files + len(trees)
+
+
+def commit_files(files, commit_message, expected_shas=None, max_attempts=3):
+    """Crea un único commit en GITHUB_BRANCH con todos los archivos de `files`.
+
+    `files` es {ruta: bytes}. `expected_shas` ({ruta: sha o None}) activa el control de
+    concurrencia: si alguno de esos archivos cambió en la rama, se lanza StaleFilesError
+    sin escribir nada. Devuelve {'commit': sha, 'blobs': {ruta: sha del blob}}.
+    """
+    expected_shas = expected_shas or {}
+
+    # Los blobs no dependen del commit padre: se crean una sola vez, varios a la vez
+    with ThreadPoolExecutor(max_workers=max(1, min(BLOB_WORKERS, len(files)))) as pool:
+        blobs = dict(zip(files, pool.map(create_blob, files.values())))
+
+    for attempt in range(max_attempts):
+        head_sha = _json_or_raise(request("GET", git_url(f"ref/heads/{GITHUB_BRANCH}")))["object"]["sha"]
+        base_tree = _json_or_raise(request("GET", git_url(f"commits/{head_sha}")))["tree"]["sha"]
+
+        trees = {}
+        stale = [
+            path for path, sha in expected_shas.items()
+            if _blob_sha_at(base_tree, path, trees) != sha
+        ]
+        if stale:
+            raise StaleFilesError(stale)
+
+        tree = _json_or_raise(request("POST", git_url("trees"), json={
+            "base_tree": base_tree,
+            "tree": [
+                {"path": path, "mode": "100644", "type": "blob", "sha": sha}
+                for path, sha in blobs.items()
+            ],
+        }))
+        commit = _json_or_raise(request("POST", git_url("commits"), json={
+            "message": commit_message,
+            "tree": tree["sha"],
+            "parents": [head_sha],
+        }))
+
+        # Sin force: si la rama avanzó mientras tanto, GitHub responde 422 y se reintenta
+        response = request("PATCH", git_url(f"refs/heads/{GITHUB_BRANCH}"), json={
+            "sha": commit["sha"],
+            "force": False,
+        })
+        if response.status_code == 422 and attempt < max_attempts - 1:
+            continue
+        response.raise_for_status()
+        return {"commit": commit["sha"], "blobs": blobs}
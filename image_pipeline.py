@@ -0,0 +1,117 @@
+# image_pipeline.py
+# Derivados de las fotos de producto: miniatura WebP para la grilla de la tienda y
+# versión WebP de tamaño "pantalla" para la vista de detalle. El original se conserva.
+#
+# Backfill del árbol img/ existente (anota además los derivados en el manifiesto):
+#     python image_store.py backfill [--force]
+
+import os
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PIL import Image, ImageOps
+
+IMG_FOLDER = "img"
+THUMB_FOLDER = f"{IMG_FOLDER}/thumbs"
+WEBP_FOLDER = f"{IMG_FOLDER}/webp"
+
+THUMB_SIZE = (480, 480)
+WEBP_SIZE = (1600, 1600)
+THUMB_QUALITY = 78
+WEBP_QUALITY = 85
+
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Fotos procesadas a la vez: Pillow libera el GIL al decodificar y redimensionar,
+# pero cada foto de 12 MP ocupa ~50 MB decodificada, así que el pool es chico.
+DERIVATIVE_WORKERS = 4
+
+
+def derivative_paths(image_path):
+    """Rutas (relativas al repo) de los derivados de una imagen original."""
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return {
+        "thumb": f"{THUMB_FOLDER}/{stem}.webp",
+        "webp": f"{WEBP_FOLDER}/{stem}.webp",
+    }
+
+
+def _encode_webp(img, size, quality):
+    resized = img.copy()
+    resized.thumbnail(size, Image.LANCZOS)
+    buffer = BytesIO()
+    resized.save(buffer, format="WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def make_derivatives(data):
+    """Genera {'thumb': bytes, 'webp': bytes} a partir de los bytes de la imagen original."""
+    with Image.open(BytesIO(data)) as img:
+        # JPEG: el decodificador puede escalar por DCT, evitando decodificar 12 MP completos
+        img.draft("RGB", WEBP_SIZE)
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        return {
+            "thumb": _encode_webp(img, THUMB_SIZE, THUMB_QUALITY),
+            "webp": _encode_webp(img, WEBP_SIZE, WEBP_QUALITY),
+        }
+
+
+def derive_many(images, on_progress=None, workers=DERIVATIVE_WORKERS):
+    """Derivados de varias fotos en paralelo.
+
+    `images` es {ruta del original: bytes}. Devuelve ({ruta del derivado: bytes},
+    [(ruta del original, error)]). `on_progress(hechas, total, ruta)` se llama desde
+    el hilo que invoca a medida que termina cada foto.
+    """
+    files, failed = {}, []
+    if not images:
+        return files, failed
+    with ThreadPoolExecutor(max_workers=min(workers, len(images))) as pool:
+        futures = {pool.submit(make_derivatives, data): path for path, data in images.items()}
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                derivatives = future.result()
+            except Exception as e:
+                failed.append((path, str(e)))
+            else:
+                for kind, derivative_path in derivative_paths(path).items():
+                    files[derivative_path] = derivatives[kind]
+            if on_progress:
+                on_progress(done, len(futures), path)
+    return files, failed
+
+
+def backfill(img_folder=IMG_FOLDER, force=False):
+    """Genera en disco los derivados que falten para todas las imágenes de `img_folder`."""
+    os.makedirs(THUMB_FOLDER, exist_ok=True)
+    os.makedirs(WEBP_FOLDER, exist_ok=True)
+
+    created, skipped, failed = 0, 0, 0
+    for file_name in sorted(os.listdir(img_folder)):
+        source_path = os.path.join(img_folder, file_name)
+        if not os.path.isfile(source_path) or not file_name.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+
+        paths = derivative_paths(f"{img_folder}/{file_name}")
+        if not force and all(os.path.exists(p) for p in paths.values()):
+            skipped += 1
+            continue
+
+        try:
+            with open(source_path, "rb") as f:
+                derivatives = make_derivatives(f.read())
+        except Exception as e:
+            print(f"Error procesando {file_name}: {e}")
+            failed += 1
+            continue
+
+        for kind, path in paths.items():
+            with open(path, "wb") as f:
+                f.write(derivatives[kind])
+        created += 1
+
+    print(f"Derivados creados: {created} | ya existentes: {skipped} | con error: {failed}")
+    return created, skipped, failed
+
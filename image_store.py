@@ -0,0 +1,224 @@
+# image_store.py
+# Fotos de producto direccionadas por contenido: cada original se guarda como
+# img/<hash>.<ext>, donde <hash> sale de los bytes y no del nombre del archivo. Dos
+# fotos distintas llamadas IMG_0067.jpeg ya no chocan, y subir dos veces la misma foto
+# no genera otro commit. El manifiesto (files_csv/images.json) registra qué fotos ya
+# están en el repo, con qué nombre se subieron y qué derivados WebP tienen (la tienda
+# solo enlaza derivados que figuran en la versión sincronizada del manifiesto);
+# products.csv guarda la ruta con hash.
+#
+# Mantenimiento del checkout local (luego hacer commit de los cambios con git):
+#     python image_store.py migrate             # renombra img/ al esquema por hash y actualiza products.csv
+#     python image_store.py backfill [--force]  # genera los derivados que falten y los anota en el manifiesto
+#     python image_store.py gc [--delete]       # fotos que ninguna fila de products.csv usa
+
+import os
+import sys
+import json
+import hashlib
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import image_pipeline
+
+MANIFEST_PATH = "files_csv/images.json"
+PRODUCTS_PATH = "files_csv/products.csv"
+HASH_LENGTH = 16
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def content_path(data, file_name):
+    """Ruta en el repo de una foto según su contenido: img/<hash>.<ext en minúsculas>."""
+    ext = os.path.splitext(file_name)[1].lower()
+    if ext == ".jpeg":
+        ext = ".jpg"
+    return f"{image_pipeline.IMG_FOLDER}/{content_hash(data)}{ext}"
+
+
+def load_manifest(text):
+    """Contenido de images.json -> {ruta: {'name', 'size', 'added', 'derivatives'}} (vacío si aún no existe)."""
+    return json.loads(text) if text else {}
+
+
+def dump_manifest(manifest):
+    return json.dumps(dict(sorted(manifest.items())), indent=2, ensure_ascii=False)
+
+
+def manifest_entry(file_name, data):
+    return {
+        "name": file_name,
+        "size": len(data),
+        "added": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+    }
+
+
+def add_images(manifest, named_images):
+    """Asigna una ruta por contenido a cada foto ({nombre original: bytes}).
+
+    Devuelve ({nombre: ruta}, {ruta: bytes} solo con las que faltan en el repo) y agrega
+    estas últimas a `manifest`. Las repetidas (dentro del lote o ya subidas) no se suben.
+    """
+    paths, new_images = {}, {}
+    for file_name, data in named_images.items():
+        path = content_path(data, file_name)
+        paths[file_name] = path
+        if path not in manifest:
+            new_images[path] = data
+            manifest[path] = manifest_entry(file_name, data)
+    return paths, new_images
+
+
+def record_derivatives(manifest, files):
+    """Anota en `manifest` los derivados cuyas rutas están en `files` junto a su original."""
+    for path, entry in manifest.items():
+        kinds = [kind for kind, p in image_pipeline.derivative_paths(path).items() if p in files]
+        if kinds:
+            entry["derivatives"] = sorted(set(entry.get("derivatives", [])) | set(kinds))
+
+
+def derivative(manifest, image_path, kind):
+    """Ruta del derivado `kind` ('thumb' o 'webp') si el manifiesto lo registra; si no, None."""
+    entry = manifest.get(image_path)
+    if entry and kind in entry.get("derivatives", ()):
+        return image_pipeline.derivative_paths(image_path)[kind]
+    return None
+
+
+# --- MANTENIMIENTO (checkout local) ---
+
+def _original_files(img_folder):
+    return sorted(
+        name for name in os.listdir(img_folder)
+        if os.path.isfile(os.path.join(img_folder, name))
+        and name.lower().endswith(image_pipeline.SOURCE_EXTENSIONS)
+    )
+
+
+def _read_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return load_manifest(f.read())
+
+
+def _write_manifest(manifest, path=MANIFEST_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dump_manifest(manifest))
+
+
+def _derivatives_on_disk(paths):
+    return {
+        p for path in paths for p in image_pipeline.derivative_paths(path).values() if os.path.exists(p)
+    }
+
+
+def _remove_with_derivatives(path):
+    removed = 0
+    for file_path in [path] + list(image_pipeline.derivative_paths(path).values()):
+        if os.path.exists(file_path):
+            removed += os.path.getsize(file_path)
+            os.remove(file_path)
+    return removed
+
+
+def migrate(img_folder=image_pipeline.IMG_FOLDER, products_path=PRODUCTS_PATH):
+    """Renombra las fotos existentes al esquema por contenido, elimina copias idénticas
+    y actualiza image_path en products.csv y el manifiesto."""
+    manifest = _read_manifest()
+    renamed, duplicates, freed = {}, 0, 0
+
+    for file_name in _original_files(img_folder):
+        old_path = f"{img_folder}/{file_name}"
+        with open(old_path, "rb") as f:
+            data = f.read()
+        new_path = content_path(data, file_name)
+        if new_path == old_path:
+            continue
+        renamed[old_path] = new_path
+        if os.path.exists(new_path):
+            # Mismo contenido ya guardado con otro nombre
+            duplicates += 1
+            freed += _remove_with_derivatives(old_path)
+            continue
+        os.rename(old_path, new_path)
+        manifest[new_path] = manifest_entry(file_name, data)
+        # Los derivados se nombran por el original: se mueven con él
+        old_derivatives = image_pipeline.derivative_paths(old_path)
+        for kind, derivative_path in image_pipeline.derivative_paths(new_path).items():
+            if os.path.exists(old_derivatives[kind]):
+                os.rename(old_derivatives[kind], derivative_path)
+
+    df = pd.read_csv(products_path, dtype=object, keep_default_na=False)
+    df["image_path"] = df["image_path"].map(lambda p: renamed.get(p, p))
+    df.to_csv(products_path, index=False)
+    record_derivatives(manifest, _derivatives_on_disk(manifest))
+    _write_manifest(manifest)
+
+    print(f"Renombradas: {len(renamed) - duplicates} | duplicadas eliminadas: {duplicates} "
+          f"({freed / 1e6:.1f} MB)")
+    return renamed
+
+
+def backfill(img_folder=image_pipeline.IMG_FOLDER, force=False):
+    """Genera en disco los derivados que falten y anota en el manifiesto los de cada original."""
+    image_pipeline.backfill(img_folder, force)
+    manifest = _read_manifest()
+    for file_name in _original_files(img_folder):
+        path = f"{img_folder}/{file_name}"
+        if path not in manifest:
+            # Fotos anteriores al manifiesto (sin migrar): se registran con su nombre actual
+            with open(path, "rb") as f:
+                manifest[path] = manifest_entry(file_name, f.read())
+    record_derivatives(manifest, _derivatives_on_disk(manifest))
+    _write_manifest(manifest)
+
+
+def unreferenced(img_folder=image_pipeline.IMG_FOLDER, products_path=PRODUCTS_PATH):
+    """Originales de `img_folder` que ninguna fila de products.csv usa."""
+    df = pd.read_csv(products_path, dtype=object, keep_default_na=False)
+    referenced = set(df["image_path"].str.strip())
+    return [
+        f"{img_folder}/{name}" for name in _original_files(img_folder)
+        if f"{img_folder}/{name}" not in referenced
+    ]
+
+
+def gc(delete=False, img_folder=image_pipeline.IMG_FOLDER, products_path=PRODUCTS_PATH):
+    """Lista (y con `delete` elimina) las fotos sin uso, sus derivados y su entrada del manifiesto."""
+    orphans = unreferenced(img_folder, products_path)
+    total = 0
+    for path in orphans:
+        size = sum(
+            os.path.getsize(p) for p in [path] + list(image_pipeline.derivative_paths(path).values())
+            if os.path.exists(p)
+        )
+        total += size
+        print(f"{path}\t{size / 1e6:.2f} MB")
+
+    if delete and orphans:
+        manifest = _read_manifest()
+        for path in orphans:
+            _remove_with_derivatives(path)
+            manifest.pop(path, None)
+        _write_manifest(manifest)
+        print(f"Eliminadas {len(orphans)} foto(s) sin uso ({total / 1e6:.1f} MB)")
+    else:
+        print(f"{len(orphans)} foto(s) sin uso ({total / 1e6:.1f} MB). Usa --delete para eliminarlas.")
+    return orphans
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "migrate":
+        migrate()
+    elif command == "backfill":
+        backfill(force="--force" in sys.argv[2:])
+    elif command == "gc":
+        gc(delete="--delete" in sys.argv[2:])
+    else:
+        print("Uso: python image_store.py migrate | backfill [--force] | gc [--delete]")
+        sys.exit(1)
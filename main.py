@@ -1,15 +1,17 @@
 # 🛍️_Tienda.py
 
 import streamlit as st
-import pandas as pd
 import os
-from PIL import Image
-import requests
-import base64
-from io import StringIO
 from dotenv import load_dotenv
 load_dotenv()
 
+import catalog
+import catalog_store
+import image_store
+import metrics
+import static_assets
+from github_client import GITHUB_TOKEN, GITHUB_REPO, GITHUB_BRANCH
+
 # --- CÓDIGO PARA CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Glint Accesorios", layout="wide", page_icon="💎")
 
@@ -42,11 +44,6 @@ st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 # -----------------------------------------------------
 
 # --- CONFIGURACIÓN DE RUTAS Y API ---
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-GITHUB_REPO = os.getenv("GITHUB_REPO")
-GITHUB_BRANCH = os.getenv("GITHUB_BRANCH") if os.getenv("GITHUB_BRANCH") else "main" 
-TIMEOUT_API = 10 
-
 if not GITHUB_TOKEN or not GITHUB_REPO:
     st.error("Error: Las credenciales de GitHub no se han cargado correctamente.")
     st.stop()
@@ -54,68 +51,230 @@ if not GITHUB_TOKEN or not GITHUB_REPO:
 IMG_FOLDER = "img"
 PRODUCTS_FILE = "products.csv"
 PRODUCTS_PATH = f"files_csv/{PRODUCTS_FILE}"
+BANNER_FILE = "Gemini_Generated_Image_fn2rx0fn2rx0fn2r (1).png"
+CSS_FILE = "casino_theme.css"
+RAW_BASE_URL = f"https://raw.githubusercontent.com/{GITHUB_REPO}/{GITHUB_BRANCH}"
 
-# --- FUNCIONES DE LECTURA DE CSV EN GITHUB ---
+# --- LECTURA DEL CATÁLOGO ---
+# Los productos se leen del store local (SQLite). El hilo de sincronización de
+# catalog_store los mantiene al día con GitHub usando peticiones condicionales (ETag).
+# Si GitHub no responde se sigue mostrando la última versión guardada, con un aviso.
+# En cada rerun se leen las revisiones de los archivos (una consulta local) y solo se
+# reconstruye lo que cambió: un guardado del admin se ve en la tienda en el siguiente rerun.
 
-@st.cache_data(ttl=600)
-def load_products_github():
-    default_columns = ['id', 'name', 'category', 'price', 'stock', 'image_path', 'description']
-    default_df = pd.DataFrame(columns=default_columns)
-    
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{PRODUCTS_PATH}"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
+# Sin sincronizar durante más que esto, el catálogo se considera desactualizado
+STALE_AFTER_SECONDS = 5 * 60
+
+@st.cache_resource(max_entries=4)
+def _catalog_for_version(version):
+    # Un Catalog por revisión del CSV, compartido por todas las sesiones
+    metrics.cache_miss("catalog")
+    products_df = catalog_store.get_store().read_products()
+    return catalog.build_catalog(products_df, version=version)
+
+def _age_text(seconds):
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{max(minutes, 1)} min"
+    hours = minutes // 60
+    return f"{hours} h" if hours < 48 else f"{hours // 24} días"
+
+def show_staleness(store):
+    """Aviso discreto cuando se muestra una copia guardada porque GitHub no responde."""
+    age, last_error = store.staleness(PRODUCTS_PATH)
+    if last_error or (age is not None and age > STALE_AFTER_SECONDS):
+        since = f" (actualizado hace {_age_text(age)})" if age is not None else ""
+        st.caption(f"🕒 Mostrando el último catálogo guardado{since}. Los precios y el stock pueden haber cambiado.")
+
+def load_catalog(versions):
+    store = catalog_store.get_store()
+    if not store.has_data(PRODUCTS_PATH):
+        last_error = store.sync_status().get(PRODUCTS_PATH, {}).get("last_error")
+        if last_error:
+            st.error(f"Error cargando productos: {last_error}")
+    else:
+        show_staleness(store)
+    metrics.cache_lookup("catalog")
+    return _catalog_for_version(versions.get(PRODUCTS_PATH, 0))
+
+# --- RECURSOS ESTÁTICOS (BANNER Y CSS) ---
+
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+@st.cache_resource
+def _published_url(path, mtime):
+    # Se publica una vez por versión del archivo; el navegador lo cachea por su URL con hash
+    return static_assets.publish(path)
+
+@st.cache_resource(max_entries=4)
+def _css_for_version(path, version):
+    # El tema que guarda el admin vive en el store; el archivo del checkout es el respaldo
+    metrics.cache_miss("css")
+    css_content = catalog_store.get_store().read_document(path)
+    return css_content if css_content is not None else static_assets.read_text(path)
+
+def banner_url():
+    return _published_url(BANNER_FILE, _mtime(BANNER_FILE))
 
-    try:
-        response = requests.get(url, headers=headers, timeout=TIMEOUT_API)
-        response.raise_for_status()
+def load_css(file_name, versions):
+    metrics.cache_lookup("css")
+    css_content = _css_for_version(file_name, versions.get(file_name, 0))
+    if css_content:
+        st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
+
+# --- MANIFIESTO DE FOTOS ---
+# Solo se enlazan derivados (miniatura y WebP de detalle) que figuran en la última versión
+# del manifiesto sincronizada con GitHub: una foto recién subida usa el original hasta que
+# el commit con sus derivados llega al repo, y todas las réplicas ven lo mismo.
+
+@st.cache_resource(max_entries=4)
+def _manifest_for_sha(sha):
+    metrics.cache_miss("manifest")
+    return image_store.load_manifest(catalog_store.get_store().base_content(image_store.MANIFEST_PATH))
+
+def load_image_manifest():
+    metrics.cache_lookup("manifest")
+    sha, _ = catalog_store.get_store().remote_state(image_store.MANIFEST_PATH)
+    return _manifest_for_sha(sha)
+
+# --- CARRITO (FRAGMENTOS) ---
+# "Agregar al Carrito" y el carrito del sidebar son fragmentos: un click no re-ejecuta
+# store_page completo. El callback del botón agrega el producto y pide el rerun del
+# fragmento CART_FRAGMENT (costo O(carrito), no O(catálogo)).
+CART_FRAGMENT = "cart"
+WHATSAPP_PHONE = "5493407404217"
+
+def add_to_cart(product_name, product_price):
+    st.session_state.cart.append({"name": product_name, "price": product_price})
+    # El toast lo muestra el carrito: un callback no debe dibujar en un rerun de fragmento
+    st.session_state.cart_added = product_name
+    # Reemplaza el rerun del botón por el del carrito del sidebar
+    st.rerun(CART_FRAGMENT)
+
+@st.fragment
+def add_to_cart_button(key, product_name, product_price):
+    st.button("Agregar al Carrito", key=key, on_click=add_to_cart, args=(product_name, product_price))
+
+def group_cart(cart):
+    """Agrupa el carrito por (nombre, precio) -> cantidad, ordenado como el antiguo groupby."""
+    counts = {}
+    for item in cart:
+        item_key = (item["name"], item["price"])
+        counts[item_key] = counts.get(item_key, 0) + 1
+    return [(name, price, qty) for (name, price), qty in sorted(counts.items())]
+
+def clear_cart():
+    st.session_state.cart = []
+
+@st.fragment(key=CART_FRAGMENT)
+def cart_sidebar():
+    added = st.session_state.pop("cart_added", None)
+    if added:
+        st.toast(f"{added} agregado al carrito!", icon="🛍️")
+    st.header("🛒 Tu Carrito")
+    cart = st.session_state.get("cart", [])
+    if len(cart) > 0:
+        total = 0
+        with metrics.stage("cart.group"):
+            grouped_cart = group_cart(cart)
         
-        file_info = response.json()
-        content_encoded = file_info["content"].replace('\n', '')
-        content_decoded = base64.b64decode(content_encoded).decode('utf-8')
+        for name, price, qty in grouped_cart:
+            subtotal = price * qty
+            st.write(f"**{qty}x** {name} - ${subtotal:,.0f}")
+            total += subtotal
         
-        df = pd.read_csv(StringIO(content_decoded))
+        st.divider()
+        st.subheader(f"Total: ${total:,.0f}")
         
-        df['price'] = pd.to_numeric(df['price'], errors='coerce').fillna(0)
-        df['stock'] = pd.to_numeric(df['stock'], errors='coerce').fillna(0).astype(int)
+        message = "Hola! Quiero encargar lo siguiente:%0A"
+        for name, price, qty in grouped_cart:
+            message += f"- {qty}x {name} (${price})%0A"
+        message += f"%0ATotal: ${total}"
         
-        return df
+        whatsapp_url = f"https://wa.me/{WHATSAPP_PHONE}?text={message}"
+        st.link_button("📲 Enviar Pedido por WhatsApp", whatsapp_url)
         
-    except Exception as e:
-        st.error(f"Error cargando productos: {str(e)}")
-        return default_df
+        st.button("Vaciar Carrito", on_click=clear_cart)
+    else:
+        st.info("El carrito está vacío.")
 
-# --- INTERFAZ: TIENDA (CLIENTE) ---
-def store_page():
-    
-    # Callback para agregar al carrito sin recargar
-    def add_to_cart_callback(product_name, product_price):
-        st.session_state.cart.append({"name": product_name, "price": product_price})
-        st.toast(f"{product_name} agregado al carrito!", icon="🛍️")
+# --- GRILLA DE PRODUCTOS ---
+# Se muestran PAGE_SIZE productos y se amplía con "Cargar más": el costo de render
+# depende de lo visible, no del tamaño del catálogo.
+PAGE_SIZE = 12
 
-    def get_base64(image_path):
-        if not os.path.exists(image_path):
-            return ""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode()
+def show_more(page_key):
+    st.session_state[page_key] = st.session_state.get(page_key, PAGE_SIZE) + PAGE_SIZE
 
-    # Carga de Logo
-    banner_base64 = get_base64("Gemini_Generated_Image_fn2rx0fn2rx0fn2r (1).png")
+def render_product_card(row, key_prefix, manifest):
+    with st.container(border=True):
+        relative_path = row['image_path']
+        raw_url = f"{RAW_BASE_URL}/{relative_path}"
+        # La grilla usa la miniatura WebP y el detalle el WebP grande (o el original)
+        thumb_path = image_store.derivative(manifest, relative_path, "thumb")
+        detail_path = image_store.derivative(manifest, relative_path, "webp")
+        
+        try:
+            if relative_path:
+                st.image(f"{RAW_BASE_URL}/{thumb_path}" if thumb_path else raw_url)
+            else:
+                st.image("https://via.placeholder.com/150?text=Sin+Foto")
+        except:
+            st.image("https://via.placeholder.com/150?text=Error")
+        
+        if relative_path and thumb_path:
+            with st.popover("🔍 Ver foto"):
+                st.image(f"{RAW_BASE_URL}/{detail_path}" if detail_path else raw_url)
+        
+        st.subheader(row['name'])
+        st.caption(row['category'].replace(" - ", " › "))
+        st.write(row['description'])
+        st.write(f"**Precio: ${row['price']:,.0f}**")
+        st.write(f"Stock: {row['stock']} un.")
+        
+        add_to_cart_button(f"btn_{key_prefix}_{row['id']}", row['name'], row['price'])
+
+def render_product_grid(products, page_key, total=None):
+    """`total`: cantidad de productos cuando `products` ya viene recortado (búsqueda)."""
+    visible = st.session_state.get(page_key, PAGE_SIZE)
+    page = products.iloc[:visible]
+    manifest = load_image_manifest()
 
-    # Cargar CSS
-    def load_css(file_name): 
-        if os.path.exists(file_name):
-            with open(file_name, "r") as f:
-                css_content = f.read() 
-                st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
+    cols = st.columns(3) 
+    for col_index, (index, row) in enumerate(page.iterrows()):
+        with cols[col_index % 3]: 
+            render_product_card(row, page_key, manifest)
 
-    load_css("casino_theme.css") 
+    remaining = (len(products) if total is None else total) - len(page)
+    if remaining > 0:
+        st.button(
+            f"Cargar más ({remaining} restantes)",
+            key=f"more_{page_key}",
+            on_click=show_more,
+            args=(page_key,)
+        )
+
+# --- INTERFAZ: TIENDA (CLIENTE) ---
+def store_page():
+    
+    # Revisiones actuales de productos y tema (una consulta local por rerun)
+    with metrics.stage("store.versions"):
+        versions = catalog_store.get_store().versions()
+
+    # Cargar CSS (texto memoizado por revisión; se relee solo si el admin lo cambió)
+    with metrics.stage("store.css"):
+        load_css(CSS_FILE, versions)
 
     # --- BANNER ---
-    if banner_base64:
+    # Se referencia por URL estática en lugar de incrustar ~1.2 MB de base64 en cada rerun
+    with metrics.stage("store.banner"):
+        banner_src = banner_url()
+    if banner_src:
         st.markdown(
             f"""
             <div class="contenedor">
-                <img src="data:image/png;base64,{banner_base64}" class="imagen-banner" alt="banner">
+                <img src="{banner_src}" class="imagen-banner" alt="banner">
             </div>
             """,
             unsafe_allow_html=True
@@ -125,127 +284,80 @@ def store_page():
 
     st.markdown("---")
     
-    products_df = load_products_github()
+    with metrics.stage("store.catalog"):
+        store_catalog = load_catalog(versions)
     
     if 'cart' not in st.session_state:
         st.session_state.cart = []
 
     # --- SIDEBAR (Ahora debería ser visible) ---
     with st.sidebar:
-        st.header("🛒 Tu Carrito")
-        if len(st.session_state.cart) > 0:
-            total = 0
-            cart_df = pd.DataFrame(st.session_state.cart)
-            
-            grouped_cart = cart_df.groupby(['name', 'price']).size().reset_index(name='cantidad')
-            
-            for index, row in grouped_cart.iterrows():
-                subtotal = row['price'] * row['cantidad']
-                st.write(f"**{row['cantidad']}x** {row['name']} - ${subtotal:,.0f}")
-                total += subtotal
-            
-            st.divider()
-            st.subheader(f"Total: ${total:,.0f}")
-            
-            phone_number = "5493407404217" 
-            message = "Hola! Quiero encargar lo siguiente:%0A"
-            for index, row in grouped_cart.iterrows():
-                message += f"- {row['cantidad']}x {row['name']} (${row['price']})%0A"
-            message += f"%0ATotal: ${total}"
-            
-            whatsapp_url = f"https://wa.me/{phone_number}?text={message}"
-            st.link_button("📲 Enviar Pedido por WhatsApp", whatsapp_url)
-            
-            def clear_cart():
-                st.session_state.cart = []
-            
-            st.button("Vaciar Carrito", on_click=clear_cart)
+        cart_sidebar()
+
+    # --- BÚSQUEDA ---
+    # Índice invertido precalculado por versión del catálogo (sin recorrer el DataFrame)
+    query = st.text_input(
+        "Buscar",
+        placeholder="🔎 Buscar productos (ej: llavero corazón, acero dorado aros)",
+        label_visibility="collapsed",
+        key="search_query"
+    ).strip()
+
+    if query:
+        # Solo se ordenan y materializan los resultados de las páginas visibles
+        page_key = f"search_{query}"
+        with metrics.stage("store.search"):
+            results, total = store_catalog.search(query, limit=st.session_state.get(page_key, PAGE_SIZE))
+        st.caption(f"{total} resultado(s) para \"{query}\"")
+        st.divider()
+        if total:
+            with metrics.stage("store.grid"):
+                render_product_grid(results, page_key, total=total)
         else:
-            st.info("El carrito está vacío.")
+            st.info("No encontramos productos con esa búsqueda.")
+        return
 
     # --- FILTROS Y CATEGORÍAS ---
-    available_products = products_df[products_df['stock'] > 0].copy()
+    # Columnas main_cat/sub_cat, orden por id e índice por categoría vienen precalculados
+    tab_names = [catalog.ALL_CATEGORIES] + list(store_catalog.main_categories)
 
-    def split_category(val):
-        if isinstance(val, str) and " - " in val:
-            parts = val.split(" - ", 1)
-            return parts[0], parts[1]
-        return val, None
+    # Solo se construye la categoría seleccionada (st.tabs renderiza todas las pestañas)
+    tab_name = st.radio(
+        label="Categoría",
+        options=tab_names,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="main_category"
+    )
 
-    if not available_products.empty:
-        available_products[['main_cat', 'sub_cat']] = available_products['category'].apply(
-            lambda x: pd.Series(split_category(x))
+    unique_subcats = store_catalog.subcategories.get(tab_name, ())
+    selected_sub = "Ver todo"
+    
+    if tab_name != catalog.ALL_CATEGORIES and len(unique_subcats) > 0:
+        sub_options = ["Ver todo"] + list(unique_subcats)
+        st.write("📂 **Filtrar por tipo:**")
+        
+        selected_sub = st.radio(
+            label="Selecciona tipo",
+            options=sub_options,
+            horizontal=True,
+            label_visibility="collapsed",
+            key=f"sub_filter_{tab_name}" 
         )
-    else:
-        available_products['main_cat'] = []
-        available_products['sub_cat'] = []
     
-    main_categories = sorted(available_products['main_cat'].dropna().unique().tolist())
-    tab_names = ["Todas"] + main_categories 
-
-    product_tabs = st.tabs(tab_names)
-
-    for i, tab_name in enumerate(tab_names):
-        with product_tabs[i]:
-            if tab_name == "Todas":
-                current_filtered_products = available_products
-            else:
-                current_filtered_products = available_products[available_products['main_cat'] == tab_name]
-            
-            unique_subcats = current_filtered_products['sub_cat'].dropna().unique().tolist()
-            
-            if tab_name != "Todas" and len(unique_subcats) > 0:
-                sub_options = ["Ver todo"] + sorted(unique_subcats)
-                st.write("📂 **Filtrar por tipo:**")
-                
-                selected_sub = st.radio(
-                    label="Selecciona tipo",
-                    options=sub_options,
-                    horizontal=True,
-                    label_visibility="collapsed",
-                    key=f"sub_filter_{i}" 
-                )
-                
-                if selected_sub != "Ver todo":
-                    current_filtered_products = current_filtered_products[current_filtered_products['sub_cat'] == selected_sub]
-            
-            st.divider()
-            
-            if not current_filtered_products.empty:
-                current_filtered_products = current_filtered_products.sort_values(by='id', ascending=True)
-
-                cols = st.columns(3) 
-                col_index = 0
-                
-                for index, row in current_filtered_products.iterrows():
-                    with cols[col_index % 3]: 
-                        with st.container(border=True):
-                            relative_path = row['image_path']
-                            raw_url = f"https://raw.githubusercontent.com/{GITHUB_REPO}/{GITHUB_BRANCH}/{relative_path}"
-                            
-                            try:
-                                if relative_path:
-                                    st.image(raw_url)
-                                else:
-                                    st.image("https://via.placeholder.com/150?text=Sin+Foto")
-                            except:
-                                st.image("https://via.placeholder.com/150?text=Error")
-                            
-                            st.subheader(row['name'])
-                            st.caption(row['category'].replace(" - ", " › "))
-                            st.write(row['description'])
-                            st.write(f"**Precio: ${row['price']:,.0f}**")
-                            st.write(f"Stock: {row['stock']} un.")
-                            
-                            st.button(
-                                "Agregar al Carrito", 
-                                key=f"btn_{tab_name}_{row['id']}",
-                                on_click=add_to_cart_callback,
-                                args=(row['name'], row['price'])
-                            )
-                    col_index += 1
-            else:
-                st.info("No hay productos disponibles en esta sección.")
+    with metrics.stage("store.select"):
+        current_filtered_products = store_catalog.select(
+            tab_name, None if selected_sub == "Ver todo" else selected_sub
+        )
+    
+    st.divider()
+    
+    if not current_filtered_products.empty:
+        with metrics.stage("store.grid"):
+            render_product_grid(current_filtered_products, page_key=f"visible_{tab_name}_{selected_sub}")
+    else:
+        st.info("No hay productos disponibles en esta sección.")
 
 if __name__ == "__main__":
-    store_page()
\ No newline at end of file
+    with metrics.script_run("store"):
+        store_page()
\ No newline at end of file
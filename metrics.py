@@ -0,0 +1,168 @@
+# metrics.py
+# Instrumentación liviana por etapa para la tienda y el panel admin: tiempos
+# (ventana de las últimas WINDOW muestras por etapa, para p50/p95), contadores
+# (aciertos de caché, peticiones y bytes traídos de GitHub) y una línea JSON por
+# rerun en el logger "tienda.metrics".
+#
+# Se desactiva con METRICS_ENABLED=0; desactivada, stage() devuelve un contexto
+# vacío compartido y count() retorna de inmediato. Con METRICS_LOG=1 las líneas
+# JSON se escriben en stderr (si no, las recibe el handler que tenga configurado
+# el deploy).
+#
+#     with metrics.stage("store.grid"):
+#         render_product_grid(...)
+#     metrics.begin_stage("admin.inventario")   # hasta el final del rerun
+#     metrics.count("github.requests")
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+WINDOW = 500
+
+logger = logging.getLogger("tienda.metrics")
+if os.getenv("METRICS_LOG") == "1" and not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+_lock = threading.Lock()
+_samples = {}    # etapa -> deque de ms
+_counters = {}   # nombre -> total
+# Etapas del rerun en curso (Streamlit ejecuta cada sesión en su propio hilo)
+_current = threading.local()
+_NOOP = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+def stage(name):
+    """Context manager que mide la etapa `name`."""
+    return _Stage(name) if ENABLED else _NOOP
+
+
+def begin_stage(name):
+    """Abre la etapa `name` sin bloque with; script_run la cierra al terminar el rerun."""
+    run = getattr(_current, "run", None)
+    if run is not None:
+        run["open"] = (name, time.perf_counter())
+
+
+def record(name, ms):
+    with _lock:
+        window = _samples.get(name)
+        if window is None:
+            window = _samples[name] = deque(maxlen=WINDOW)
+        window.append(ms)
+    run = getattr(_current, "run", None)
+    if run is not None:
+        run["stages"][name] = run["stages"].get(name, 0.0) + ms
+
+
+def count(name, n=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+    run = getattr(_current, "run", None)
+    if run is not None:
+        run["counters"][name] = run["counters"].get(name, 0) + n
+
+
+def cache_lookup(name):
+    """Acceso a una función memoizada (en el lugar de la llamada)."""
+    count(f"cache.{name}.lookups")
+
+
+def cache_miss(name):
+    """Fallo de caché: llamarla dentro del cuerpo de la función memoizada."""
+    count(f"cache.{name}.misses")
+
+
+def cache_hit_rates(counters):
+    """{caché: (accesos, tasa de aciertos)} a partir de los contadores cache.*"""
+    rates = {}
+    for key, lookups in counters.items():
+        if key.startswith("cache.") and key.endswith(".lookups") and lookups:
+            name = key[len("cache."):-len(".lookups")]
+            misses = counters.get(f"cache.{name}.misses", 0)
+            rates[name] = (lookups, max(0.0, 1 - misses / lookups))
+    return rates
+
+
+@contextmanager
+def script_run(page):
+    """Mide un rerun completo de `page` y al terminar lo registra como una línea JSON."""
+    if not ENABLED:
+        yield
+        return
+    _current.run = {"stages": {}, "counters": {}, "open": None}
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        # st.rerun()/st.stop() terminan el script con una excepción: igual se registra
+        end = time.perf_counter()
+        if _current.run["open"] is not None:
+            name, opened = _current.run["open"]
+            record(name, (end - opened) * 1000)
+        total = (end - start) * 1000
+        record(f"{page}.total", total)
+        run, _current.run = _current.run, None
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "event": "script_run",
+                "page": page,
+                "ts": round(time.time(), 3),
+                "total_ms": round(total, 2),
+                "stages": {k: round(v, 2) for k, v in run["stages"].items()},
+                "counters": run["counters"],
+            }, ensure_ascii=False))
+
+
+def _percentile(sorted_samples, q):
+    return sorted_samples[min(len(sorted_samples) - 1, int(round(q * (len(sorted_samples) - 1))))]
+
+
+def snapshot():
+    """([{etapa, n, p50_ms, p95_ms, max_ms}], {contador: total}) de las muestras actuales."""
+    with _lock:
+        samples = {name: sorted(window) for name, window in _samples.items()}
+        counters = dict(_counters)
+    stages = [
+        {
+            "etapa": name,
+            "n": len(values),
+            "p50_ms": round(_percentile(values, 0.5), 2),
+            "p95_ms": round(_percentile(values, 0.95), 2),
+            "max_ms": round(values[-1], 2),
+        }
+        for name, values in sorted(samples.items()) if values
+    ]
+    return stages, counters
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _counters.clear()
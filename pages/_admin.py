@@ -3,10 +3,6 @@
 import streamlit as st
 import pandas as pd
 import os
-from PIL import Image
-import requests
-import base64
-from io import StringIO
 import json
 from dotenv import load_dotenv
 from hashlib import sha256
@@ -16,6 +12,15 @@ import re
 # Cargar variables de entorno
 load_dotenv()
 
+import bulk_import
+import catalog_store
+import changesets
+import github_client
+import image_pipeline
+import image_store
+import metrics
+from github_client import GITHUB_TOKEN, GITHUB_REPO
+
 # --- CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Bijoutery Glam - Admin", layout="wide", page_icon="⚙️")
 
@@ -34,35 +39,27 @@ div[data-testid="stSidebar"] {
 st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
 # --- VARIABLES Y CREDENCIALES ---
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-GITHUB_REPO = os.getenv("GITHUB_REPO")
-GITHUB_BRANCH = os.getenv("GITHUB_BRANCH") if os.getenv("GITHUB_BRANCH") else "main"
-TIMEOUT_API = 10 
 IMG_FOLDER = "img"
 PRODUCTS_FILE = "products.csv"
 PRODUCTS_PATH = f"files_csv/{PRODUCTS_FILE}"
 CATEGORIES_FILE = "categories.json" # <--- AGREGAR ESTA VARIABLE
 CATEGORIES_PATH = f"files_csv/{CATEGORIES_FILE}"
 CSS_FILE = "casino_theme.css"
+SECTIONS = ["➕ Agregar Producto", "📦 Importación Masiva", "📝 Inventario", "🎨 Personalizar Diseño"]
+# Etapa de métricas de cada sección (misma posición que en SECTIONS)
+SECTION_STAGES = ["admin.agregar", "admin.importar", "admin.inventario", "admin.diseno"]
+# Solo aparece con ?diag=1 en la URL
+DIAG_SECTION = "🩺 Diagnóstico"
 # Validación de credenciales
 if not GITHUB_TOKEN or not GITHUB_REPO:
     st.error("Error: Las credenciales de GitHub (GITHUB_TOKEN y GITHUB_REPO) no se han cargado correctamente.")
     st.stop()
 
-# Asegurar carpeta local temporal
-if not os.path.exists(IMG_FOLDER):
-    os.makedirs(IMG_FOLDER)
-
 # --- FUNCIONES DE AUTENTICACIÓN ---
 def init_session_state():
     """Inicializa las variables de sesión"""
     if 'authenticated' not in st.session_state:
         st.session_state.authenticated = False
-    if 'products_df' not in st.session_state:
-        st.session_state['products_df'] = load_products_github()
-    # --- NUEVO: CARGAR CATEGORÍAS ---
-    if 'categories_data' not in st.session_state:
-        st.session_state['categories_data'] = load_categories_github()
     if 'username' not in st.session_state:
         st.session_state.username = ""
     if 'attempts' not in st.session_state:
@@ -79,50 +76,107 @@ def check_credentials(username, password):
     return (username in valid_credentials and 
             valid_credentials[username] == hash_password(password))
 
-# --- FUNCIONES DE GITHUB ---
+# --- FUNCIONES DE DATOS ---
+# Lecturas y escrituras van al store local (catalog_store, SQLite). Un hilo en
+# segundo plano sube los cambios a GitHub y trae los cambios remotos, así que
+# guardar ya no bloquea la interfaz esperando a la API. Las lecturas se memoizan
+# por revisión y se comparten entre sesiones: un rerun no vuelve a leer nada si
+# el archivo no cambió, y sesiones simultáneas esperan a una sola lectura.
+
+def get_store():
+    return catalog_store.get_store()
+
+@st.cache_resource(max_entries=4)
+def _products_for_version(version):
+    metrics.cache_miss("admin_products")
+    return get_store().read_products()
+
+@st.cache_resource(max_entries=8)
+def _document_for_version(path, version):
+    metrics.cache_miss("admin_document")
+    return get_store().read_document(path)
+
+def read_document(path):
+    metrics.cache_lookup("admin_document")
+    return _document_for_version(path, get_store().versions().get(path, 0))
+
+def load_session_data():
+    """Copia de productos y categorías de la sesión; se renueva si cambiaron en el store
+    (guardado de otra sesión o réplica, o cambio traído de GitHub)."""
+    versions = get_store().versions()
+    for key, path, loader in (
+        ('products_df', PRODUCTS_PATH, load_products),
+        ('categories_data', CATEGORIES_PATH, load_categories),
+    ):
+        version = versions.get(path, 0)
+        if key not in st.session_state or st.session_state.get(f'{key}_version') != version:
+            st.session_state[key] = loader()
+            st.session_state[f'{key}_version'] = version
+
+def resolve_conflict(path, keep_local):
+    if not get_store().resolve_conflict(path, keep_local):
+        st.toast("El inventario cambió mientras tanto: revisá el conflicto y elegí de nuevo.", icon="⚠️")
+    # La copia de la sesión puede haber quedado vieja
+    st.session_state.pop('products_df', None)
+    st.session_state.pop('categories_data', None)
+
+def show_sync_status():
+    """Aviso de cambios pendientes de subir, conflictos o errores de sincronización."""
+    status = get_store().sync_status()
+    pending = sum(s["pending"] for s in status.values())
+
+    # Conflictos reales (misma celda cambiada aquí y en GitHub): decide el admin
+    for path, path_status in status.items():
+        if path_status["conflicts"]:
+            with st.container(border=True):
+                st.error(f"⚠️ Conflicto al guardar `{path}`: alguien más lo modificó al mismo tiempo.")
+                for conflict in path_status["conflicts"]:
+                    st.write(f"- {conflict}")
+                c1, c2 = st.columns(2)
+                c1.button("Conservar mis cambios", key=f"keep_{path}", on_click=resolve_conflict, args=(path, True))
+                c2.button("Usar la versión de GitHub", key=f"drop_{path}", on_click=resolve_conflict, args=(path, False))
+
+    errors = [f"{path}: {s['last_error']}" for path, s in status.items() if s["last_error"] and not s["conflicts"]]
+    if errors:
+        # Tras cada fallo seguido la subida espera el doble (ver catalog_store.PUSH_RETRY_MIN)
+        retries = [s["retry_at"] for s in status.values() if s["last_error"] and s["pending"] and s["retry_at"]]
+        wait = max(0, round(min(retries) - time.time())) if retries else None
+        if wait:
+            retry = f"próximo intento en {wait} s" if wait < 60 else f"próximo intento en {round(wait / 60)} min"
+        else:
+            retry = "se reintenta automáticamente"
+        st.warning(f"Problemas sincronizando con GitHub ({retry}):\n\n" + "\n\n".join(errors))
+    elif pending:
+        st.caption(f"⏳ {pending} cambio(s) pendiente(s) de subir a GitHub...")
+
+    budget = github_client.budget
+    if budget.is_low():
+        minutes = max(1, round(budget.seconds_to_reset() / 60))
+        # Lo que costaría subir ahora lo pendiente (un blob por archivo, fotos incluidas)
+        pending_paths = [p for p, s in status.items() if s["pending"] and p != catalog_store.STAGED_KEY]
+        staged = status.get(catalog_store.STAGED_KEY, {}).get("pending", 0)
+        if budget.allows(github_client.commit_cost(len(pending_paths) + staged, pending_paths), write=True):
+            st.caption(
+                f"🐢 Queda poca cuota de la API de GitHub ({budget.remaining} de {budget.limit}, se renueva "
+                f"en {minutes} min): la tienda busca cambios con menos frecuencia. Los guardados se suben igual."
+            )
+        else:
+            st.warning(
+                f"Se agotó la cuota de la API de GitHub: los cambios se guardan aquí y se suben "
+                f"cuando se renueve (en {minutes} min)."
+            )
 
 # --- FUNCIONES PARA GESTIÓN DE TEMA (CSS) ---
 
-def load_css_github():
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{CSS_FILE}"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
+def load_css():
+    css_content = read_document(CSS_FILE)
+    if css_content is None:
+        st.error("Error cargando CSS: el archivo aún no se sincronizó desde GitHub.")
+    return css_content
 
+def save_css(css_content, commit_message="Actualización de diseño"):
     try:
-        response = requests.get(url, headers=headers, timeout=TIMEOUT_API)
-        response.raise_for_status()
-        
-        file_info = response.json()
-        content_encoded = file_info["content"].replace('\n', '')
-        content_decoded = base64.b64decode(content_encoded).decode('utf-8')
-        
-        st.session_state['css_sha'] = file_info.get("sha")
-        return content_decoded
-    except Exception as e:
-        st.error(f"Error cargando CSS: {e}")
-        return None
-
-def save_css_github(css_content, commit_message="Actualización de diseño"):
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{CSS_FILE}"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-
-    try:
-        sha = st.session_state.get('css_sha')
-        encoded_content = base64.b64encode(css_content.encode('utf-8')).decode()
-
-        data = {
-            "message": commit_message,
-            "content": encoded_content,
-            "branch": GITHUB_BRANCH,
-        }
-        if sha:
-            data["sha"] = sha
-
-        response = requests.put(url, headers=headers, json=data, timeout=TIMEOUT_API)
-        response.raise_for_status()
-        
-        # Actualizar SHA
-        st.session_state['css_sha'] = response.json().get("content", {}).get("sha")
-        return True
+        return get_store().write_document(CSS_FILE, css_content, commit_message)
     except Exception as e:
         st.error(f"Error guardando CSS: {e}")
         return False
@@ -155,7 +209,7 @@ def extract_colors_from_css(css_content):
     return found_colors
 
 # --- FUNCIONES PARA CATEGORÍAS (JSON) ---
-def load_categories_github():
+def load_categories():
     # Estructura por defecto si no existe el archivo aún
     default_categories = {
         "Acero Blanco": ["Aros", "Pulseras", "Collares", "Dijes", "Anillos"],
@@ -166,178 +220,247 @@ def load_categories_github():
         "Complementos": []
     }
     
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{CATEGORIES_PATH}"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-
     try:
-        response = requests.get(url, headers=headers, timeout=TIMEOUT_API)
-        response.raise_for_status()
-        
-        file_info = response.json()
-        content_encoded = file_info["content"].replace('\n', '')
-        content_decoded = base64.b64decode(content_encoded).decode('utf-8')
-        
-        st.session_state['categories_sha'] = file_info.get("sha")
-        return json.loads(content_decoded) # Convertimos texto a Diccionario Python
-        
+        content = read_document(CATEGORIES_PATH)
+        if content is None:
+            # Todavía no existe (404) o no se pudo sincronizar: usamos el default
+            return default_categories
+        return json.loads(content) # Convertimos texto a Diccionario Python
     except Exception:
-        # Si falla (404 no existe), devolvemos el default y el SHA nulo
-        st.session_state['categories_sha'] = None
         return default_categories
 
-def save_categories_github(categories_dict, commit_message="Actualización de Categorías"):
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{CATEGORIES_PATH}"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-
+def save_categories(categories_dict, commit_message="Actualización de Categorías"):
     try:
-        sha = st.session_state.get('categories_sha')
         # Convertir diccionario a JSON texto
         json_content = json.dumps(categories_dict, indent=4, ensure_ascii=False)
-        encoded_content = base64.b64encode(json_content.encode('utf-8')).decode()
-
-        data = {
-            "message": commit_message,
-            "content": encoded_content,
-            "branch": GITHUB_BRANCH,
-        }
-        if sha:
-            data["sha"] = sha
-
-        response = requests.put(url, headers=headers, json=data, timeout=TIMEOUT_API)
-        response.raise_for_status()
-        
-        # Actualizar SHA
-        response_json = response.json()
-        st.session_state['categories_sha'] = response_json.get("content", {}).get("sha")
-        return True
+        return get_store().write_document(CATEGORIES_PATH, json_content, commit_message)
     except Exception as e:
         st.error(f"Error guardando categorías: {e}")
         return False
     
     
-def load_products_github():
-    default_columns = ['id', 'name', 'category', 'price', 'stock', 'image_path', 'description']
-    default_df = pd.DataFrame(columns=default_columns)
-    
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{PRODUCTS_PATH}"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-
-    try:
-        response = requests.get(url, headers=headers, timeout=TIMEOUT_API)
-        response.raise_for_status()
-        
-        file_info = response.json()
-        content_encoded = file_info["content"].replace('\n', '')
-        content_decoded = base64.b64decode(content_encoded).decode('utf-8')
-        
-        st.session_state['products_sha'] = file_info.get("sha")
-        
-        return pd.read_csv(StringIO(content_decoded))
-        
-    except requests.exceptions.HTTPError as http_err:
-        if response.status_code == 404:
+def load_products():
+    store = get_store()
+    if not store.has_data(PRODUCTS_PATH):
+        last_error = store.sync_status().get(PRODUCTS_PATH, {}).get("last_error")
+        if last_error:
+            st.error(f"Error cargando productos: {last_error}")
+        else:
             st.warning("Archivo products.csv no encontrado, creando uno nuevo.")
-            st.session_state['products_sha'] = None
-            return default_df
-        st.error(f"Error HTTP al cargar productos: {http_err}")
-    except Exception as e:
-        st.error(f"Error cargando productos: {str(e)}")
-    
-    st.session_state['products_sha'] = None
-    return default_df
-
-def save_products_github(df, commit_message="Actualización de Inventario"):
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{PRODUCTS_PATH}"
-    headers = {
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
+    # Copia: la sesión la modifica y el DataFrame memoizado es compartido
+    metrics.cache_lookup("admin_products")
+    return _products_for_version(store.versions().get(PRODUCTS_PATH, 0)).copy()
 
+def save_products(df, commit_message="Actualización de Inventario"):
     try:
-        sha = st.session_state.get('products_sha')
-        csv_content = df.to_csv(index=False)
-        encoded_content = base64.b64encode(csv_content.encode('utf-8')).decode()
-
-        data = {
-            "message": commit_message,
-            "content": encoded_content,
-            "branch": GITHUB_BRANCH,
-        }
-        if sha:
-            data["sha"] = sha
-
-        put_response = requests.put(url, headers=headers, json=data, timeout=TIMEOUT_API)
-        put_response.raise_for_status()
-        
-        response_json = put_response.json()
-        # Actualizar SHA inmediatamente para evitar conflictos en guardados consecutivos
-        st.session_state['products_sha'] = response_json.get("content", {}).get("sha")
-
-        return response_json
+        return get_store().replace_products(df, commit_message)
     except Exception as e:
-        st.error(f"Error al guardar en GitHub: {e}")
+        st.error(f"Error al guardar el inventario: {e}")
         return False
 
-def upload_image_to_github(repo, token, branch, local_path, github_path, commit_message="Admin panel: Upload image"):
-    try:
-        with open(local_path, "rb") as image_file:
-            content = image_file.read()
-    except FileNotFoundError:
-        return False
-        
-    content_encoded = base64.b64encode(content).decode('utf-8')
-    url = f"https://api.github.com/repos/{repo}/contents/{github_path}"
-    headers = {"Authorization": f"token {token}"}
-    data = {
-        "message": commit_message,
-        "content": content_encoded,
-        "branch": branch
-    }
+def save_product_changes(changes, commit_message="Actualización de Inventario", files=None, documents=None):
+    """Guarda solo las filas cambiadas (ChangeSet) en lugar del inventario completo.
 
+    `files` (fotos) y `documents` (manifiesto de imágenes) se suben en el mismo commit que el CSV.
+    """
     try:
-        response = requests.put(url, headers=headers, json=data)
-        response.raise_for_status()
-        return True
+        return get_store().apply_changes(changes, commit_message, files=files, documents=documents)
     except Exception as e:
-        st.error(f"Error subiendo imagen: {e}")
+        st.error(f"Error al guardar el inventario: {e}")
         return False
 
-def handle_image_upload(uploaded_file, GITHUB_REPO, GITHUB_TOKEN, GITHUB_BRANCH, IMG_FOLDER):
+def handle_image_upload(uploaded_file):
+    """Prepara la foto para subirla en el mismo commit que el producto.
+
+    Devuelve (ruta en el repo, {ruta: bytes} con el original y sus derivados, documentos
+    a guardar), (None, {}, {}) si no hay foto o (False, {}, {}) si no se pudo leer.
+    """
     if uploaded_file is None:
-        return None
+        return None, {}, {}
 
     file_name = uploaded_file.name
-    # Usar IMG_FOLDER local temporalmente
-    local_path = os.path.join(IMG_FOLDER, file_name)
-    
+
     try:
-        with open(local_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        content = uploaded_file.getvalue()
     except Exception as e:
-        st.error(f"Error al guardar localmente: {e}")
+        st.error(f"Error al leer la imagen: {e}")
+        return False, {}, {}
+
+    # Ruta por contenido ('img/<hash>.jpg'): si la foto ya está en el repo no se sube de nuevo
+    paths, files, documents = prepare_images({file_name: content})
+    return paths[file_name], files, documents
+
+def prepare_images(named_images):
+    """{nombre original: bytes} -> ({nombre: ruta en el repo}, {ruta: bytes} a subir, documentos).
+
+    Solo se procesan y suben las fotos cuyo contenido todavía no está en el manifiesto;
+    los documentos incluyen el manifiesto actualizado si hubo fotos nuevas.
+    """
+    manifest = image_store.load_manifest(read_document(image_store.MANIFEST_PATH))
+    paths, new_images = image_store.add_images(manifest, named_images)
+    if not new_images:
+        return paths, {}, {}
+    files = process_images(new_images)
+    # La tienda enlaza los derivados que el manifiesto sincronizado registra: se anotan
+    # aquí y llegan a GitHub en el mismo commit que los archivos
+    image_store.record_derivatives(manifest, files)
+    return paths, files, {image_store.MANIFEST_PATH: image_store.dump_manifest(manifest)}
+
+# --- IMPORTACIÓN MASIVA ---
+
+def prepare_import(sheet_file, zip_file):
+    """Lee la planilla y el ZIP y valida el lote (no guarda nada). Devuelve el ImportPlan o None."""
+    try:
+        sheet = bulk_import.read_sheet(sheet_file.name, sheet_file.getvalue())
+    except ImportError:
+        st.error("Para importar planillas Excel hace falta el paquete openpyxl. Exporta la planilla como CSV.")
+        return None
+    except Exception as e:
+        st.error(f"No se pudo leer la planilla: {e}")
         return None
 
-    # Ruta relativa para el CSV y GitHub
-    github_path = f"img/{file_name}" # Asegurar estructura 'img/archivo.jpg'
-    
-    upload_success = upload_image_to_github(
-        repo=GITHUB_REPO,
-        token=GITHUB_TOKEN,
-        branch=GITHUB_BRANCH,
-        local_path=local_path,
-        github_path=github_path,
-        commit_message=f"Admin: Upload image {file_name}"
+    try:
+        photos = bulk_import.read_photos(zip_file.getvalue()) if zip_file else {}
+    except Exception as e:
+        st.error(f"No se pudo leer el ZIP de fotos: {e}")
+        return None
+
+    products = get_store().read_products()
+    next_id = int(products['id'].max()) + 1 if not products.empty and pd.notna(products['id'].max()) else 1
+    return bulk_import.build_plan(sheet, photos, st.session_state['categories_data'], next_id)
+
+def show_import_report(plan):
+    """Resultado de la simulación: errores, advertencias y vista previa de las altas."""
+    for line, message in plan.errors:
+        st.error(f"Fila {line}: {message}" if line else message)
+    if plan.warnings:
+        with st.expander(f"⚠️ {len(plan.warnings)} advertencia(s)"):
+            for line, message in plan.warnings:
+                st.write(f"- Fila {line}: {message}" if line else f"- {message}")
+    if plan.rows:
+        st.write(f"**{len(plan.rows)} producto(s)** y **{len(plan.photos)} foto(s)** a importar:")
+        st.dataframe(plan.report(), hide_index=True)
+
+def run_import(plan):
+    """Procesa las fotos en paralelo y guarda el lote completo en un único ChangeSet."""
+    _, files, documents = prepare_images(plan.photos)
+
+    # Los ids definitivos los asigna el store en la misma transacción que inserta las filas
+    rows = [dict(row, id=None) for row in plan.rows]
+    changes = changesets.ChangeSet(inserted=rows)
+    return save_product_changes(
+        changes, f"Importación masiva: {len(rows)} producto(s)", files=files, documents=documents
     )
 
-    if os.path.exists(local_path):
-        os.remove(local_path)
-        
-    if upload_success:
-        return github_path
-    else:
-        return False
+# --- FOTOS: VARIAS A LA VEZ ---
+
+def process_images(images):
+    """Genera los derivados de {ruta: bytes} en un pool de hilos mostrando el avance por
+    archivo. Devuelve los originales más los derivados, listos para encolar."""
+    total = len(images)
+    if not total:
+        return {}
+    with st.status(f"Procesando {total} foto(s)...", expanded=total > 1) as status:
+        progress = st.progress(0.0)
+
+        def on_progress(done, total, path):
+            progress.progress(done / total, text=f"{done}/{total}")
+            status.write(f"✅ {os.path.basename(path)}")
+
+        derived, failed = image_pipeline.derive_many(images, on_progress)
+        for path, error in failed:
+            # Sin derivados la tienda sigue mostrando el original
+            status.write(f"⚠️ {os.path.basename(path)}: no se pudieron generar las miniaturas ({error})")
+        status.update(label=f"{total} foto(s) procesadas", state="error" if failed else "complete", expanded=bool(failed))
+
+    files = dict(images)
+    files.update(derived)
+    return files
+
+def upload_photos(uploaded_files, targets, products_df):
+    """Sube varias fotos en un solo commit. `targets` tiene, para cada foto, el id del
+    producto cuya foto reemplaza (o None: solo se sube). Devuelve el DataFrame actualizado o None."""
+    # Nombres únicos: desde el celular varias fotos pueden llamarse image.jpg
+    names = []
+    for uploaded in uploaded_files:
+        name, copy = uploaded.name, 2
+        while name in names:
+            root, extension = os.path.splitext(uploaded.name)
+            name, copy = f"{root} ({copy}){extension}", copy + 1
+        names.append(name)
+    named_images = {name: f.getvalue() for name, f in zip(names, uploaded_files)}
+    paths, files, documents = prepare_images(named_images)
+
+    current = dict(zip(products_df['id'], products_df['image_path']))
+    changes = changesets.ChangeSet()
+    for name, row_id in zip(names, targets):
+        if row_id is None:
+            continue
+        new_path = paths[name]
+        if current.get(row_id) != new_path:
+            changes.updated[int(row_id)] = {'image_path': new_path}
+
+    message = f"Fotos: {', '.join(named_images)}"
+    if changes.is_empty():
+        if not files:
+            st.info("Esas fotos ya estaban subidas.")
+            return products_df
+        try:
+            get_store().stage_files(files, message, documents=documents)
+        except Exception as e:
+            st.error(f"Error al guardar las fotos: {e}")
+            return None
+        return products_df
+    if not save_product_changes(changes, message, files=files, documents=documents):
+        return None
+    st.write(f"Foto reemplazada en {len(changes.updated)} producto(s).")
+    return changesets.apply_changes(products_df, changes)
 
 # --- PÁGINAS ---
+# --- DIAGNÓSTICO (oculto, ?diag=1) ---
+def show_diagnostics():
+    """Tiempos p50/p95 por etapa y contadores de este proceso (también van al log como JSON)."""
+    st.subheader("🩺 Diagnóstico de rendimiento")
+    if not metrics.ENABLED:
+        st.info("Las métricas están desactivadas (METRICS_ENABLED=0).")
+        return
+    stages, counters = metrics.snapshot()
+    st.caption(f"Últimas {metrics.WINDOW} muestras por etapa, sumando todas las sesiones de esta réplica.")
+    if stages:
+        st.dataframe(pd.DataFrame(stages), hide_index=True, width="stretch")
+    else:
+        st.info("Todavía no hay muestras.")
+
+    rates = metrics.cache_hit_rates(counters)
+    if rates:
+        st.write("**Cachés**")
+        st.dataframe(
+            pd.DataFrame(
+                [{"caché": name, "accesos": lookups, "aciertos %": round(rate * 100, 1)}
+                 for name, (lookups, rate) in sorted(rates.items())]
+            ),
+            hide_index=True,
+            width="stretch",
+        )
+    other = {k: v for k, v in sorted(counters.items()) if not k.startswith("cache.")}
+    if other:
+        st.write("**Contadores**")
+        st.dataframe(
+            pd.DataFrame([{"contador": k, "total": v} for k, v in other.items()]),
+            hide_index=True,
+            width="stretch",
+        )
+    quota = github_client.budget.snapshot()
+    if quota["remaining"] is not None:
+        st.write("**Cuota de la API de GitHub**")
+        st.write(
+            f"{quota['remaining']} de {quota['limit']} peticiones (reserva para guardados: "
+            f"{quota['reserve']}), se renueva en {quota['reset_in'] // 60} min."
+        )
+    if st.button("Reiniciar métricas"):
+        metrics.reset()
+        st.rerun()
+
 def login_page():
     st.title("Login")
     with st.form("login_form"):
@@ -365,14 +488,25 @@ def main():
         login_page()
     else:
         st.title("Panel de Administración", anchor=False)    
+        with metrics.stage("admin.sync_status"):
+            show_sync_status()
 
-        # Cargar DF de sesión
-        df = st.session_state['products_df'].copy()
-            
-        tab1, tab2, tab3 = st.tabs(["➕ Agregar Producto", "📝 Inventario", "🎨 Personalizar Diseño"])
+        # Cargar DF de sesión (solo después del login)
+        with metrics.stage("admin.session_data"):
+            load_session_data()
+            df = st.session_state['products_df'].copy()
+
+        # Solo se ejecuta la sección elegida (con st.tabs se ejecutaban todas en cada rerun)
+        sections = SECTIONS + [DIAG_SECTION] if st.query_params.get("diag") == "1" else SECTIONS
+        section = st.segmented_control(
+            "Sección", sections, default=SECTIONS[0], key="admin_section", label_visibility="collapsed"
+        ) or SECTIONS[0]
+
+        # Mide la sección elegida hasta el final del rerun (la cierra script_run)
+        metrics.begin_stage(SECTION_STAGES[SECTIONS.index(section)] if section in SECTIONS else "admin.diagnostico")
 
         # --- Pestaña 1: Agregar Producto ---
-        with tab1:
+        if section == SECTIONS[0]:
             st.subheader("Nuevo Producto")
             # ---------------------------------------------------------
             # SECCIÓN 1: GESTOR DE CATEGORÍAS (NUEVO)
@@ -417,7 +551,7 @@ def main():
                                 st.warning("Ese tipo ya existe en esta categoría.")
 
                         if updated:
-                            if save_categories_github(current_cats, "Nueva categoría añadida"):
+                            if save_categories(current_cats, "Nueva categoría añadida"):
                                 st.session_state['categories_data'] = current_cats
                                 st.success("Categoría actualizada!")
                                 time.sleep(1)
@@ -462,38 +596,76 @@ def main():
                     if name and price > 0:
                         
                         # Subir imagen
-                        img_path = handle_image_upload(image, GITHUB_REPO, GITHUB_TOKEN, GITHUB_BRANCH, IMG_FOLDER)
+                        img_path, image_files, image_documents = handle_image_upload(image)
                         if img_path is False:
-                            st.warning(f"Error al subir la imagen. Intenta de nuevo.")
+                            st.warning(f"Error al leer la imagen. Intenta de nuevo.")
                             st.stop()
                         
-                        next_id = df['id'].max() + 1 if not df.empty and pd.notna(df['id'].max()) else 1
-                        
-                        new_product = pd.DataFrame([{
-                            'id': next_id,
+                        # El id lo asigna el store al insertar: otra pestaña u otra réplica
+                        # pudo agregar productos después de leer este DataFrame
+                        new_row = {
+                            'id': None,
                             'name': name, 
                             'category': category_final, 
                             'price': price, 
                             'stock': stock, 
                             'image_path': img_path if img_path else "", 
                             'description': desc
-                        }])
-                        
-                        updated_df = pd.concat([df, new_product], ignore_index=True)
-                        
-                        github_response = save_products_github(updated_df, f"Añadido producto: {name} ({category_final})")
+                        }
+                        github_response = save_product_changes(
+                            changesets.ChangeSet(inserted=[new_row]),
+                            f"Añadido producto: {name} ({category_final})",
+                            files=image_files,
+                            documents=image_documents
+                        )
                         
                         if github_response:
-                            st.session_state['products_df'] = updated_df 
+                            st.session_state['products_df'] = get_store().read_products()
                             st.success(f"🎉 **Producto '{name}' agregado con éxito!**")
                             st.rerun()
                         else:
-                            st.error("El producto no pudo guardarse en el CSV de GitHub.")
+                            st.error("El producto no pudo guardarse en el inventario.")
                     else:
                         st.error("El nombre y el precio son obligatorios.")
 
+        # --- Pestaña: Importación masiva (planilla + ZIP de fotos) ---
+        if section == SECTIONS[1]:
+            st.subheader("Importar una colección completa")
+            st.write(
+                "Sube una planilla (CSV o Excel) con las columnas **name, category, price**, "
+                "y opcionalmente **stock, image, description**, más un ZIP con las fotos. "
+                "La columna *image* es el nombre del archivo dentro del ZIP y *category* debe "
+                "existir en las categorías (ej: `Acero Blanco - Aros`)."
+            )
+            c_sheet, c_zip = st.columns(2)
+            sheet_file = c_sheet.file_uploader("Planilla de productos", type=["csv", "xlsx"], key="import_sheet")
+            zip_file = c_zip.file_uploader("ZIP con las fotos", type=["zip"], key="import_zip")
+
+            # El plan validado se reutiliza mientras no cambien los archivos
+            import_key = (
+                sheet_file.file_id if sheet_file else None,
+                zip_file.file_id if zip_file else None,
+            )
+            if st.session_state.get('import_key') != import_key:
+                st.session_state['import_key'] = import_key
+                st.session_state.pop('import_plan', None)
+
+            if sheet_file and st.button("🔎 Validar (simulación, no guarda nada)"):
+                st.session_state['import_plan'] = prepare_import(sheet_file, zip_file)
+
+            plan = st.session_state.get('import_plan')
+            if plan is not None:
+                show_import_report(plan)
+                if plan.ok and st.button(f"📦 Importar {len(plan.rows)} producto(s)", type="primary"):
+                    if run_import(plan):
+                        st.session_state.pop('import_plan', None)
+                        st.session_state['products_df'] = get_store().read_products()
+                        st.success(f"🎉 {len(plan.rows)} producto(s) importados. Se suben a GitHub en un solo commit.")
+                        time.sleep(1)
+                        st.rerun()
+
         # --- Pestaña 2: Editar/Eliminar Inventario ---
-        with tab2:
+        if section == SECTIONS[2]:
             st.subheader("Gestión de Inventario")
             
             if not df.empty:
@@ -518,13 +690,53 @@ def main():
                 )
                 
                 if st.button("💾 Guardar Cambios en Stock/Precio"):
-                    if not edited_df.equals(df):
-                        if save_products_github(edited_df, "Actualización masiva de inventario"):
-                            st.session_state['products_df'] = edited_df
-                            st.success("Inventario actualizado en GitHub.")
-                            st.rerun()
+                    changes = changesets.diff_products(df, edited_df)
+                    if changes is None:
+                        # Ids repetidos: no se puede diferenciar por fila, se guarda todo
+                        saved = None if edited_df.equals(df) else save_products(edited_df, "Actualización masiva de inventario")
+                    elif not changes.is_empty():
+                        saved = save_product_changes(changes, f"Inventario: {changes.summary()}")
                     else:
+                        saved = None
+
+                    if saved is None:
                         st.info("No hay cambios para guardar.")
+                    elif saved:
+                        st.session_state['products_df'] = edited_df
+                        st.success("Inventario actualizado. Se sincroniza con GitHub en segundo plano.")
+                        st.rerun()
+
+                st.divider()
+                st.write("### Subir o reemplazar fotos")
+                st.caption(
+                    "Puedes elegir varias fotos a la vez y, para cada una, el producto cuya foto reemplaza "
+                    "(o ninguno: solo se sube). Las fotos idénticas a otras ya subidas no se vuelven a subir."
+                )
+                # La clave cambia después de subir: así el uploader queda vacío
+                photo_round = st.session_state.get('photo_round', 0)
+                photo_files = st.file_uploader(
+                    "Fotos", type=["jpg", "png", "jpeg"], accept_multiple_files=True, key=f"photo_uploader_{photo_round}"
+                )
+                if photo_files:
+                    product_labels = {None: "— Ninguno (solo subir) —"}
+                    product_labels.update({int(i): f"{int(i)} · {n}" for i, n in zip(df['id'], df['name']) if pd.notna(i)})
+                    targets = [
+                        st.selectbox(
+                            f"Reemplazar con `{photo.name}` la foto de:",
+                            list(product_labels),
+                            format_func=product_labels.get,
+                            key=f"photo_target_{photo_round}_{photo.file_id}",
+                        )
+                        for photo in photo_files
+                    ]
+                    if st.button("📷 Subir fotos"):
+                        updated_df = upload_photos(photo_files, targets, df)
+                        if updated_df is not None:
+                            st.session_state['products_df'] = updated_df
+                            st.session_state['photo_round'] = photo_round + 1
+                            st.success(f"{len(photo_files)} foto(s) listas. Se suben a GitHub en segundo plano.")
+                            time.sleep(1)
+                            st.rerun()
 
                 st.divider()
                 st.write("### Eliminar producto")
@@ -535,9 +747,11 @@ def main():
                 if st.button("🗑️ Eliminar Producto"):
                     if product_to_delete_name:
                         # Filtrar para eliminar
-                        updated_df = df[df['name'] != product_to_delete_name].reset_index(drop=True)
+                        to_delete = df['name'] == product_to_delete_name
+                        updated_df = df[~to_delete].reset_index(drop=True)
+                        changes = changesets.ChangeSet(deleted=[int(i) for i in df.loc[to_delete, 'id']])
                         
-                        if save_products_github(updated_df, f"Eliminado producto: {product_to_delete_name}"):
+                        if save_product_changes(changes, f"Eliminado producto: {product_to_delete_name}"):
                             st.session_state['products_df'] = updated_df
                             st.success(f"Producto '{product_to_delete_name}' eliminado del listado.")
                             st.rerun()
@@ -546,60 +760,65 @@ def main():
             else:
                 st.info("No hay productos cargados en el inventario.")
         # --- Pestaña 3: Personalizar Diseño ---
-    with tab3:
-        st.subheader("🎨 Estética de la Tienda")
-        st.info("Aquí puedes cambiar los colores de la tienda. Los cambios se aplicarán al guardar.")
+        if section == SECTIONS[3]:
+            st.subheader("🎨 Estética de la Tienda")
+            st.info("Aquí puedes cambiar los colores de la tienda. Los cambios se aplicarán al guardar.")
 
-        # 1. Cargar CSS actual
-        css_content = load_css_github()
+            # 1. Cargar CSS actual
+            css_content = load_css()
 
-        if css_content:
-            # 2. Extraer colores actuales
-            current_colors = extract_colors_from_css(css_content)
+            if css_content:
+                # 2. Extraer colores actuales
+                current_colors = extract_colors_from_css(css_content)
             
-            # 3. Formulario de edición
-            with st.form("theme_form"):
-                st.write("### Paleta de Colores")
+                # 3. Formulario de edición
+                with st.form("theme_form"):
+                    st.write("### Paleta de Colores")
                 
-                col1, col2 = st.columns(2)
-                new_values = {}
+                    col1, col2 = st.columns(2)
+                    new_values = {}
                 
-                # Iteramos sobre los colores encontrados para crear los pickers
-                for i, (var_name, data) in enumerate(current_colors.items()):
-                    # Distribuir en 2 columnas
-                    with (col1 if i % 2 == 0 else col2):
-                        new_values[var_name] = st.color_picker(
-                            label=data["label"],
-                            value=data["value"],
-                            key=f"cp_{var_name}"
-                        )
+                    # Iteramos sobre los colores encontrados para crear los pickers
+                    for i, (var_name, data) in enumerate(current_colors.items()):
+                        # Distribuir en 2 columnas
+                        with (col1 if i % 2 == 0 else col2):
+                            new_values[var_name] = st.color_picker(
+                                label=data["label"],
+                                value=data["value"],
+                                key=f"cp_{var_name}"
+                            )
                 
-                st.write("---")
-                submitted = st.form_submit_button("💾 Guardar Nuevo Diseño")
+                    st.write("---")
+                    submitted = st.form_submit_button("💾 Guardar Nuevo Diseño")
                 
-                if submitted:
-                    # 4. Reemplazar colores en el texto CSS
-                    updated_css = css_content
-                    changes_made = False
+                    if submitted:
+                        # 4. Reemplazar colores en el texto CSS
+                        updated_css = css_content
+                        changes_made = False
                     
-                    for var_name, new_hex in new_values.items():
-                        old_hex = current_colors[var_name]["value"]
-                        if new_hex != old_hex:
-                            # Reemplazo seguro usando Regex para esa línea específica
-                            pattern = f"({var_name}:\s*)#[0-9a-fA-F]{{6}}(;)"
-                            replacement = f"\\g<1>{new_hex}\\g<2>"
-                            updated_css = re.sub(pattern, replacement, updated_css)
-                            changes_made = True
+                        for var_name, new_hex in new_values.items():
+                            old_hex = current_colors[var_name]["value"]
+                            if new_hex != old_hex:
+                                # Reemplazo seguro usando Regex para esa línea específica
+                                pattern = f"({var_name}:\s*)#[0-9a-fA-F]{{6}}(;)"
+                                replacement = f"\\g<1>{new_hex}\\g<2>"
+                                updated_css = re.sub(pattern, replacement, updated_css)
+                                changes_made = True
                     
-                    if changes_made:
-                        if save_css_github(updated_css, "Admin: Cambio de colores"):
-                            st.success("¡Diseño actualizado! Los cambios pueden tardar unos minutos en reflejarse en la tienda.")
-                            st.balloons()
-                            time.sleep(2)
-                            st.rerun()
-                    else:
-                        st.info("No cambiaste ningún color.")
-        else:
-            st.error("No se pudo cargar el archivo de estilos CSS desde GitHub.")
+                        if changes_made:
+                            if save_css(updated_css, "Admin: Cambio de colores"):
+                                st.success("¡Diseño actualizado! La tienda ya muestra los nuevos colores.")
+                                st.balloons()
+                                time.sleep(2)
+                                st.rerun()
+                        else:
+                            st.info("No cambiaste ningún color.")
+            else:
+                st.error("No se pudo cargar el archivo de estilos CSS desde GitHub.")
+
+        if section == DIAG_SECTION:
+            show_diagnostics()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with metrics.script_run("admin"):
+        main()
\ No newline at end of file
@@ -0,0 +1,97 @@
+# search_index.py
+# Índice invertido en memoria para la búsqueda de la tienda. Se construye una vez
+# por versión del catálogo (ver catalog.build_catalog) a partir de name, category y
+# description; las consultas no recorren el DataFrame.
+#
+# - Normaliza tildes y mayúsculas ("CORAZON" encuentra "corazón").
+# - Cada palabra de la consulta debe aparecer (AND), completa o como prefijo.
+# - Ranking: suma de pesos por campo; una coincidencia exacta vale más que un prefijo.
+# - Con `limit` solo se ordenan las mejores filas (heap): un prefijo corto como "a"
+#   coincide con casi todo el catálogo, pero la tienda muestra una página.
+
+import re
+import heapq
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+PREFIX_FACTOR = 0.5
+# Términos con sus puntajes memoizados por índice: mientras se escribe, "c", "co",
+# "cor"... se repiten entre sesiones y un prefijo corto suma las filas de muchos tokens
+TERM_CACHE_SIZE = 256
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold(text):
+    """Minúsculas y sin tildes/diacríticos."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    if not isinstance(text, str):
+        return []
+    return _TOKEN_RE.findall(fold(text))
+
+
+class SearchIndex:
+    def __init__(self, postings):
+        # token -> {posición de fila: peso}
+        self._postings = postings
+        self._tokens = sorted(postings)
+        # Por instancia: el índice es inmutable y se descarta con su versión del catálogo
+        self._matches = lru_cache(maxsize=TERM_CACHE_SIZE)(self._term_scores)
+
+    @classmethod
+    def build(cls, products_df):
+        """Indexa las filas de `products_df`; los resultados son posiciones (iloc)."""
+        postings = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            if field not in products_df.columns:
+                continue
+            for position, value in enumerate(products_df[field].tolist()):
+                for token in set(tokenize(value)):
+                    rows = postings.setdefault(token, {})
+                    rows[position] = rows.get(position, 0.0) + weight
+        return cls(postings)
+
+    def _term_scores(self, term):
+        """{posición: puntaje} de un término de la consulta (exacto + prefijos). No modificar:
+        el resultado queda memoizado en `_matches`."""
+        scores = dict(self._postings.get(term, {}))
+        start = bisect_left(self._tokens, term)
+        for token in self._tokens[start:]:
+            if not token.startswith(term):
+                break
+            if token == term:
+                continue
+            for position, weight in self._postings[token].items():
+                prefix_score = weight * PREFIX_FACTOR
+                if prefix_score > scores.get(position, 0.0):
+                    scores[position] = prefix_score
+        return scores
+
+    def search(self, query, limit=None):
+        """(posiciones de las filas que coinciden con todas las palabras, de mayor a menor
+        puntaje y a lo sumo `limit`; cantidad total de coincidencias)."""
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+
+        total = None
+        # Los términos más selectivos primero: la intersección se achica antes
+        for scores in sorted((self._matches(t) for t in set(terms)), key=len):
+            if total is None:
+                total = scores
+            else:
+                total = {p: s + scores[p] for p, s in total.items() if p in scores}
+            if not total:
+                return [], 0
+
+        # A igual puntaje, primero la fila anterior (orden por id del catálogo)
+        rank = lambda p: (total[p], -p)
+        if limit is None:
+            return sorted(total, key=rank, reverse=True), len(total)
+        return heapq.nlargest(limit, total, key=rank), len(total)
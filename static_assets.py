@@ -0,0 +1,57 @@
+# static_assets.py
+# Publica archivos (banner, etc.) en la carpeta static/ de Streamlit con nombre
+# versionado por contenido, para que el navegador los descargue una sola vez en
+# lugar de recibirlos en base64 por el websocket en cada rerun.
+#
+# Requiere `enableStaticServing = true` en .streamlit/config.toml.
+#
+# Streamlit sirve app/static (Starlette) con ETag y Last-Modified pero sin
+# Cache-Control: el navegador lo guarda con su caché heurística y, al revalidar,
+# vuelve a bajar el archivo (ese endpoint no responde 304). Como el nombre lleva el
+# hash del contenido, un archivo publicado nunca cambia: si hay un proxy o CDN delante
+# conviene que agregue `Cache-Control: public, max-age=31536000, immutable` para
+# /app/static/. Sin eso todo funciona igual, solo con alguna descarga de más.
+
+import os
+import shutil
+from hashlib import sha256
+
+STATIC_FOLDER = "static"
+STATIC_URL = "app/static"
+
+
+def content_hash(path, length=12):
+    with open(path, "rb") as f:
+        return sha256(f.read()).hexdigest()[:length]
+
+
+def publish(source_path):
+    """Copia `source_path` a static/<nombre>.<hash><ext> (si no estaba) y devuelve su URL.
+
+    Devuelve None si el archivo de origen no existe.
+    """
+    if not os.path.exists(source_path):
+        return None
+
+    digest = content_hash(source_path)
+    stem, ext = os.path.splitext(os.path.basename(source_path))
+    # Nombre seguro para URL: sin espacios ni paréntesis
+    safe_stem = "".join(c if c.isalnum() or c in "-_" else "_" for c in stem)
+    file_name = f"{safe_stem}.{digest}{ext.lower()}"
+
+    target_path = os.path.join(STATIC_FOLDER, file_name)
+    if not os.path.exists(target_path):
+        os.makedirs(STATIC_FOLDER, exist_ok=True)
+        tmp_path = f"{target_path}.tmp"
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, target_path)
+
+    # Un contenido nuevo es una URL nueva: el navegador nunca muestra una versión vieja
+    return f"{STATIC_URL}/{file_name}"
+
+
+def read_text(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return f.read()
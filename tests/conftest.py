@@ -0,0 +1,19 @@
+import pandas as pd
+import pytest
+
+import catalog_store
+
+COLUMNS = catalog_store.PRODUCT_COLUMNS
+
+
+def products(*rows, category="LLAVEROS - Llaveros"):
+    """DataFrame de productos a partir de tuplas (id, nombre, precio, stock)."""
+    return pd.DataFrame(
+        [[i, name, category, price, stock, f"img/{i}.jpg", ""] for i, name, price, stock in rows],
+        columns=COLUMNS,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return catalog_store.CatalogStore(str(tmp_path / "catalog.sqlite3"))
@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+from bulk_import import _number, build_plan, read_sheet
+
+CATEGORIES = {"LLAVEROS": ["Llaveros"]}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("7500", 7500),
+    ("7.500", 7500),
+    ("$ 12.000", 12000),
+    ("$12.000", 12000),
+    ("1.234.567", 1234567),
+    ("7.500,50", 7500.5),
+    ("1.234.567,5", 1234567.5),
+    ("7500,5", 7500.5),
+    ("7,50", 7.5),
+    ("7500.5", 7500.5),
+    ("7.50", 7.5),
+    ("0.500", 0.5),
+    ("12 000", 12000),
+    ("  3 ", 3),
+])
+def test_number_argentine_formats(text, expected):
+    assert _number(text) == expected
+
+
+@pytest.mark.parametrize("text", ["7,500", "1,234,567", "7,500.50", "1.234.5", "1.23.456", "12,5,0", "abc", "-5", ""])
+def test_number_rejects_invalid_or_ambiguous(text):
+    with pytest.raises(ValueError):
+        _number(text)
+
+
+def test_number_ambiguous_has_a_hint():
+    with pytest.raises(ValueError, match="ambiguo"):
+        _number("7,500")
+
+
+def test_number_excel_cells_are_already_numbers():
+    # Excel entrega floats: 12.345 es doce coma algo, no doce mil
+    assert _number(12.345) == 12.345
+    assert _number(7500) == 7500
+    with pytest.raises(ValueError):
+        _number(float("nan"))
+
+
+def sheet(*rows):
+    return pd.DataFrame(rows, columns=["name", "category", "price", "stock"], dtype=object)
+
+
+def test_build_plan_reads_thousands_and_flags_ambiguous_rows():
+    plan = build_plan(
+        sheet(
+            ["Oso", "Llaveros - Llaveros", "$ 12.000", "1.000"],
+            ["Corazón", "LLAVEROS-llaveros", "7,500", "1"],
+            ["Estrella", "LLAVEROS - Llaveros", "8.700,50", "2,5"],
+        ),
+        {},
+        CATEGORIES,
+        next_id=10,
+    )
+    assert plan.rows[0]["price"] == 12000 and plan.rows[0]["stock"] == 1000
+    assert plan.rows[0]["category"] == "LLAVEROS - Llaveros"
+    errors = dict(plan.errors)
+    assert "precio inválido (7,500): formato ambiguo" in errors[3]
+    assert "stock inválido (2,5)" in errors[4]
+    assert not plan.ok
+
+
+def test_read_sheet_keeps_text_for_number_parsing():
+    data = "name;category;price;stock\nOso;LLAVEROS - Llaveros;7.500;1\n".encode("utf-8")
+    df = read_sheet("productos.csv", data)
+    assert df.loc[0, "price"] == "7.500"
+    plan = build_plan(df, {}, CATEGORIES, next_id=1)
+    assert plan.ok and plan.rows[0]["price"] == 7500
@@ -0,0 +1,74 @@
+import pandas as pd
+
+from catalog import ALL_CATEGORIES, build_catalog
+from conftest import products
+from search_index import SearchIndex
+
+
+def catalog_df():
+    return pd.concat([
+        products((5, "Oso", 100.0, 1), (1, "Corazón", 200.0, 2)),
+        products((3, "Aros luna", 300.0, 3), (4, "Aros sol", 300.0, 0), category="ACERO - Aros"),
+        products((2, "Pañuelo", 50.0, 1), category="PAÑUELOS"),
+    ], ignore_index=True)
+
+
+# --- build_catalog ---
+
+def test_build_catalog_positions_follow_id_order_and_skip_out_of_stock():
+    store_catalog = build_catalog(catalog_df())
+    assert store_catalog.select(ALL_CATEGORIES)["id"].tolist() == [1, 2, 3, 5]
+    assert store_catalog.select("LLAVEROS")["id"].tolist() == [1, 5]
+    assert store_catalog.select("ACERO", "Aros")["id"].tolist() == [3]
+    assert store_catalog.select("PAÑUELOS")["id"].tolist() == [2]
+
+
+def test_build_catalog_categories_and_unknown_selection():
+    store_catalog = build_catalog(catalog_df())
+    assert store_catalog.main_categories == ("ACERO", "LLAVEROS", "PAÑUELOS")
+    assert store_catalog.subcategories == {"ACERO": ("Aros",), "LLAVEROS": ("Llaveros",), "PAÑUELOS": ()}
+    assert store_catalog.select("ORO").empty
+    assert store_catalog.select("LLAVEROS", "Aros").empty
+
+
+def test_catalog_search_returns_page_and_total():
+    store_catalog = build_catalog(catalog_df())
+    page, total = store_catalog.search("aros")
+    assert total == 1 and page["name"].tolist() == ["Aros luna"]
+    page, total = store_catalog.search("l", limit=2)
+    assert total == 3 and page["id"].tolist() == [3, 1]
+
+
+# --- SearchIndex ---
+
+def index(*rows):
+    return SearchIndex.build(pd.DataFrame(rows, columns=["name", "category", "description"]))
+
+
+def test_search_folds_accents_and_requires_every_word():
+    search_index = index(("Corazón dorado", "LLAVEROS", ""), ("Corazón", "ACERO", "plateado"))
+    assert search_index.search("CORAZON") == ([0, 1], 2)
+    assert search_index.search("corazon plateado") == ([1], 1)
+    assert search_index.search("corazon rojo") == ([], 0)
+    assert search_index.search("  ¿? ") == ([], 0)
+
+
+def test_search_ranks_by_field_weight_and_exact_over_prefix():
+    search_index = index(
+        ("Llavero", "ACERO", "con luna"),    # descripción
+        ("Luna", "ACERO", ""),               # nombre
+        ("Aros", "LUNA", ""),                # categoría
+        ("Lunares", "ACERO", ""),            # prefijo en el nombre
+    )
+    positions, total = search_index.search("luna")
+    assert total == 4
+    assert positions == [1, 2, 3, 0]
+
+
+def test_search_limit_keeps_the_best_rows_in_order():
+    search_index = index(*[(f"Oso {i}", "LLAVEROS", "oso" if i % 2 else "") for i in range(10)])
+    full, total = search_index.search("oso")
+    # Empate: primero la fila anterior
+    assert full == [1, 3, 5, 7, 9, 0, 2, 4, 6, 8]
+    assert search_index.search("oso", limit=3) == (full[:3], total)
+    assert search_index.search("oso", limit=50) == (full, total)
@@ -0,0 +1,44 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import changesets
+from changesets import ChangeSet, clean_frame, clean_value, diff_products
+
+
+def products(rows):
+    return pd.DataFrame(rows, columns=["id", "name", "price", "stock"])
+
+
+def test_clean_value_converts_numpy_and_nan():
+    assert clean_value(np.int64(3)) == 3 and type(clean_value(np.int64(3))) is int
+    assert clean_value(float("nan")) is None
+    assert clean_value(pd.NA) is None
+    assert clean_value("nan") == "nan"
+
+
+def test_clean_frame_matches_clean_value():
+    df = pd.DataFrame({"id": pd.array([1, None], dtype="Int64"), "price": [1.5, np.nan], "name": ["a", None]})
+    rows = list(clean_frame(df).itertuples(index=False, name=None))
+    assert rows == [tuple(clean_value(v) for v in r) for r in df.astype(object).itertuples(index=False, name=None)]
+    assert rows == [(1, 1.5, "a"), (None, None, None)]
+    assert type(rows[0][0]) is int
+
+
+def test_diff_products_is_json_serializable():
+    before = products([[1, "a", 10.0, 1], [2, "b", 20.0, 2]])
+    after = products([[1, "a", 15.0, 1], [3, "c", 30.0, 3]])
+    changes = diff_products(before, after)
+    assert changes.updated == {1: {"price": 15.0}}
+    assert changes.deleted == [2]
+    assert changes.inserted == [{"id": 3, "name": "c", "price": 30.0, "stock": 3}]
+    assert ChangeSet.from_json(changes.to_json()) == changes
+    json.dumps(changes.inserted)
+
+
+def test_apply_changes_round_trip():
+    before = products([[1, "a", 10.0, 1], [2, "b", 20.0, 2]])
+    after = products([[1, "a", 15.0, 0], [3, "c", 30.0, 3]])
+    result = changesets.apply_changes(before, diff_products(before, after))
+    pd.testing.assert_frame_equal(result, after, check_dtype=False)
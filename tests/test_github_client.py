@@ -0,0 +1,112 @@
+import pytest
+
+import github_client
+from github_client import COMMIT_REQUESTS, RateBudget, commit_cost
+
+NOW = 1_000_000.0
+
+
+def headers(remaining, reset=NOW + 600, limit=5000, **extra):
+    values = {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(reset)),
+    }
+    values.update(extra)
+    return values
+
+
+# --- RateBudget ---
+
+def test_budget_reads_rate_limit_headers():
+    budget = RateBudget(reserve=100)
+    budget.update(headers(4000))
+    assert (budget.limit, budget.remaining, budget.reset_at) == (5000, 4000, NOW + 600)
+    assert budget.seconds_to_reset(now=NOW) == 600
+
+
+@pytest.mark.parametrize("bad", [
+    {},
+    {"X-RateLimit-Remaining": "abc", "X-RateLimit-Reset": "1"},
+    headers(10, **{"X-RateLimit-Resource": "search"}),
+])
+def test_budget_ignores_missing_invalid_or_other_resource_headers(bad):
+    budget = RateBudget()
+    budget.update(bad)
+    assert budget.remaining is None
+    assert budget.allows(10_000, write=True, now=NOW)
+
+
+def test_budget_keeps_the_lowest_remaining_within_a_window():
+    budget = RateBudget()
+    budget.update(headers(90))
+    budget.update(headers(95))   # respuesta más vieja que llegó tarde
+    assert budget.remaining == 90
+    budget.update(headers(4999, reset=NOW + 4200))   # nueva ventana
+    assert budget.remaining == 4999
+    budget.update(headers(10))   # ventana anterior: se descarta
+    assert budget.remaining == 4999
+
+
+def test_budget_reserve_is_only_for_writes():
+    budget = RateBudget(reserve=100)
+    budget.update(headers(105))
+    assert budget.allows(5, now=NOW)
+    assert not budget.allows(6, now=NOW)
+    assert budget.allows(105, write=True, now=NOW)
+    assert not budget.allows(106, write=True, now=NOW)
+    # Pasado el reset la cuota vuelve a estar completa
+    assert budget.allows(500, write=True, now=NOW + 601)
+
+
+def test_budget_stretches_interval_only_when_low():
+    budget = RateBudget(reserve=100, low=0.1)
+    budget.update(headers(4000))
+    assert budget.stretch(60, now=NOW) == 60
+    budget.update(headers(110))
+    # 10 peticiones de sobra para 600 s: una consulta de 2 peticiones cada 120 s
+    assert budget.stretch(60, cost=2, now=NOW) == 120
+    budget.update(headers(100))
+    assert budget.stretch(60, now=NOW) == 600
+
+
+# --- commit_cost ---
+
+def test_commit_cost_without_sha_checks():
+    assert commit_cost(0) == COMMIT_REQUESTS
+    assert commit_cost(5) == COMMIT_REQUESTS + 5
+
+
+def test_commit_cost_lists_every_tree_on_the_path():
+    # img/thumbs necesita listar img y img/thumbs además de la raíz
+    assert commit_cost(1, ["img/thumbs/a.webp"]) == COMMIT_REQUESTS + 1 + 3
+    assert commit_cost(1, ["casino_theme.css"]) == COMMIT_REQUESTS + 1 + 1
+
+
+# --- request ---
+
+class FakeResponse:
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.headers = headers
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_request_closes_rate_limited_responses_before_retrying(monkeypatch):
+    responses = [
+        FakeResponse(429, {"Retry-After": "1"}),
+        FakeResponse(201, {}),
+    ]
+    session = type("Session", (), {"request": lambda self, *a, **k: responses.pop(0)})()
+    sleeps = []
+    monkeypatch.setattr(github_client, "get_session", lambda: session)
+    monkeypatch.setattr(github_client.time, "sleep", sleeps.append)
+    monkeypatch.setattr(github_client, "budget", RateBudget())
+    limited, created = list(responses)
+
+    assert github_client.request("POST", "https://api.test/x", json={}) is created
+    assert limited.closed and not created.closed
+    assert sleeps == [1.0]
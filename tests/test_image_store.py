@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import image_pipeline
+import image_store
+from conftest import products
+
+
+# --- add_images ---
+
+def test_add_images_names_by_content_and_skips_repeats():
+    manifest = {}
+    paths, new_images = image_store.add_images(manifest, {"IMG_1.JPEG": b"oso", "copia.jpg": b"oso", "b.png": b"luna"})
+    oso = f"img/{image_store.content_hash(b'oso')}.jpg"
+    assert paths == {"IMG_1.JPEG": oso, "copia.jpg": oso, "b.png": f"img/{image_store.content_hash(b'luna')}.png"}
+    assert set(new_images) == {oso, paths["b.png"]}
+    assert manifest[oso]["name"] == "IMG_1.JPEG" and manifest[oso]["size"] == 3
+
+    # Ya subida: misma ruta, nada nuevo y el manifiesto no cambia
+    again, new_images = image_store.add_images(manifest, {"otra.jpg": b"oso"})
+    assert again == {"otra.jpg": oso} and new_images == {}
+    assert manifest[oso]["name"] == "IMG_1.JPEG"
+
+
+def test_derivatives_are_linked_only_once_recorded():
+    manifest = {}
+    paths, _ = image_store.add_images(manifest, {"a.jpg": b"oso"})
+    path = paths["a.jpg"]
+    assert image_store.derivative(manifest, path, "thumb") is None
+
+    derived = image_pipeline.derivative_paths(path)
+    image_store.record_derivatives(manifest, {path: b"oso", derived["thumb"]: b"mini"})
+    assert image_store.derivative(manifest, path, "thumb") == derived["thumb"]
+    assert image_store.derivative(manifest, path, "webp") is None
+    assert image_store.derivative(manifest, "img/otra.jpg", "thumb") is None
+
+    loaded = image_store.load_manifest(image_store.dump_manifest(manifest))
+    assert loaded[path]["derivatives"] == ["thumb"]
+
+
+# --- gc ---
+
+@pytest.fixture
+def checkout(tmp_path, monkeypatch):
+    """Checkout con dos fotos (una sin uso), sus derivados y el manifiesto."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("files_csv")
+    os.makedirs(image_pipeline.THUMB_FOLDER)
+    manifest = {}
+    paths, new_images = image_store.add_images(manifest, {"usada.jpg": b"usada", "huerfana.jpg": b"huerfana"})
+    for path, data in new_images.items():
+        with open(path, "wb") as f:
+            f.write(data)
+        with open(image_pipeline.derivative_paths(path)["thumb"], "wb") as f:
+            f.write(b"mini")
+    image_store._write_manifest(manifest)
+    df = products((1, "Oso", 100.0, 1))
+    df["image_path"] = paths["usada.jpg"]
+    df.to_csv(image_store.PRODUCTS_PATH, index=False)
+    return paths
+
+
+def test_gc_lists_unreferenced_photos_without_deleting(checkout):
+    assert image_store.gc() == [checkout["huerfana.jpg"]]
+    assert os.path.exists(checkout["huerfana.jpg"])
+
+
+def test_gc_delete_removes_photo_derivatives_and_manifest_entry(checkout):
+    orphan = checkout["huerfana.jpg"]
+    assert image_store.gc(delete=True) == [orphan]
+    assert not os.path.exists(orphan)
+    assert not os.path.exists(image_pipeline.derivative_paths(orphan)["thumb"])
+    assert os.path.exists(checkout["usada.jpg"])
+    assert set(image_store._read_manifest()) == {checkout["usada.jpg"]}
@@ -0,0 +1,190 @@
+import json
+
+import pandas as pd
+
+import catalog_store
+import image_store
+from catalog_store import CATEGORIES_PATH, CSS_PATH, MANIFEST_PATH, PRODUCTS_PATH, merge_content
+from changesets import ChangeSet, merge_dicts, merge_products
+from conftest import products
+
+
+def csv(*rows):
+    return products(*rows).to_csv(index=False)
+
+
+BASE = products((1, "Oso", 100.0, 1), (2, "Corazón", 200.0, 2), (3, "Estrella", 300.0, 3))
+
+
+# --- merge_products ---
+
+def test_merge_products_combines_disjoint_edits():
+    local = products((1, "Oso", 150.0, 1), (2, "Corazón", 200.0, 2), (3, "Estrella", 300.0, 3))
+    remote = products((1, "Oso", 100.0, 1), (2, "Corazón", 200.0, 5), (3, "Estrella", 300.0, 3))
+    merged, conflicts = merge_products(BASE, local, remote)
+    assert conflicts == []
+    assert merged.set_index("id").loc[1, "price"] == 150.0
+    assert merged.set_index("id").loc[2, "stock"] == 5
+
+
+def test_merge_products_same_cell_is_a_conflict():
+    local = products((1, "Oso", 150.0, 1), (2, "Corazón", 200.0, 2), (3, "Estrella", 300.0, 3))
+    remote = products((1, "Oso", 120.0, 1), (2, "Corazón", 200.0, 2), (3, "Estrella", 300.0, 3))
+    merged, conflicts = merge_products(BASE, local, remote)
+    assert merged is None
+    assert len(conflicts) == 1 and "'price'" in conflicts[0]
+
+
+def test_merge_products_same_value_on_both_sides_is_not_a_conflict():
+    both = products((1, "Oso", 150.0, 1), (2, "Corazón", 200.0, 2), (3, "Estrella", 300.0, 3))
+    merged, conflicts = merge_products(BASE, both, both.copy())
+    assert conflicts == []
+    assert merged.set_index("id").loc[1, "price"] == 150.0
+
+
+def test_merge_products_edit_against_delete_is_a_conflict():
+    local = products((1, "Oso", 150.0, 1), (2, "Corazón", 200.0, 2), (3, "Estrella", 300.0, 3))
+    remote = products((2, "Corazón", 200.0, 2), (3, "Estrella", 300.0, 3))
+    merged, conflicts = merge_products(BASE, local, remote)
+    assert merged is None and "eliminado en GitHub" in conflicts[0]
+
+    merged, conflicts = merge_products(BASE, remote, local)
+    assert merged is None and "eliminado aquí" in conflicts[0]
+
+
+def test_merge_products_renumbers_colliding_inserts():
+    local = pd.concat([BASE, products((4, "Local", 10.0, 1))], ignore_index=True)
+    remote = pd.concat([BASE, products((4, "Remoto", 20.0, 1))], ignore_index=True)
+    merged, conflicts = merge_products(BASE, local, remote)
+    assert conflicts == []
+    assert merged.set_index("id")["name"].to_dict() == {
+        1: "Oso", 2: "Corazón", 3: "Estrella", 4: "Remoto", 5: "Local",
+    }
+
+
+def test_merge_products_prefer_local_resolves_only_conflicting_cells():
+    local = products((1, "Oso", 150.0, 1), (2, "Corazón", 200.0, 2), (3, "Estrella", 300.0, 3))
+    remote = products((1, "Oso", 120.0, 9), (2, "Corazón", 200.0, 2), (3, "Estrella fugaz", 300.0, 3))
+    merged, conflicts = merge_products(BASE, local, remote, prefer_local=True)
+    assert len(conflicts) == 1
+    merged = merged.set_index("id")
+    assert merged.loc[1, "price"] == 150.0
+    assert merged.loc[1, "stock"] == 9
+    assert merged.loc[3, "name"] == "Estrella fugaz"
+
+
+def test_merge_products_prefer_local_restores_row_deleted_remotely():
+    local = products((1, "Oso", 150.0, 1), (2, "Corazón", 200.0, 2), (3, "Estrella", 300.0, 3))
+    remote = products((2, "Corazón", 200.0, 7), (3, "Estrella", 300.0, 3))
+    merged, _ = merge_products(BASE, local, remote, prefer_local=True)
+    merged = merged.set_index("id")
+    assert merged.loc[1, "price"] == 150.0
+    assert merged.loc[2, "stock"] == 7
+
+
+# --- merge_dicts ---
+
+def test_merge_dicts_applies_local_additions_and_removals():
+    base = {"a": "1", "b": "2"}
+    local = {"a": "1", "c": "3"}
+    remote = {"a": "1", "b": "2", "d": "4"}
+    assert merge_dicts(base, local, remote) == {"a": "1", "c": "3", "d": "4"}
+
+
+def test_merge_dicts_local_change_wins_over_unchanged_remote():
+    assert merge_dicts({"a": "1"}, {"a": "2"}, {"a": "1", "b": "3"}) == {"a": "2", "b": "3"}
+
+
+# --- merge_content ---
+
+def test_merge_content_trivial_cases():
+    assert merge_content(CSS_PATH, "a", "a", "b") == ("b", [])
+    assert merge_content(CSS_PATH, "a", "b", "a") == ("b", [])
+    assert merge_content(CSS_PATH, "a", "b", "b") == ("b", [])
+
+
+def test_merge_content_unmergeable_document_conflicts_unless_prefer_local():
+    content, conflicts = merge_content(CSS_PATH, "a", "b", "c")
+    assert content is None and conflicts
+    assert merge_content(CSS_PATH, "a", "b", "c", prefer_local=True) == ("b", [])
+
+
+def test_merge_content_products_without_conflicts():
+    base = csv((1, "Oso", 100.0, 1), (2, "Corazón", 200.0, 2))
+    local = csv((1, "Oso", 150.0, 1), (2, "Corazón", 200.0, 2))
+    remote = csv((1, "Oso", 100.0, 1), (2, "Corazón", 200.0, 4))
+    content, conflicts = merge_content(PRODUCTS_PATH, base, local, remote)
+    assert conflicts == []
+    merged = catalog_store.parse_products_csv(content).set_index("id")
+    assert merged.loc[1, "price"] == 150.0 and merged.loc[2, "stock"] == 4
+
+
+def test_merge_content_products_with_conflicts():
+    base = csv((1, "Oso", 100.0, 1))
+    content, conflicts = merge_content(PRODUCTS_PATH, base, csv((1, "Oso", 150.0, 1)), csv((1, "Oso", 120.0, 1)))
+    assert content is None and len(conflicts) == 1
+
+
+def test_merge_content_products_without_base_is_a_conflict():
+    content, conflicts = merge_content(PRODUCTS_PATH, None, csv((1, "Oso", 150.0, 1)), csv((1, "Oso", 120.0, 1)))
+    assert content is None and conflicts
+
+
+def test_merge_content_categories():
+    base = json.dumps({"LLAVEROS": ["Llaveros"]})
+    local = json.dumps({"LLAVEROS": ["Llaveros", "Mini"]})
+    remote = json.dumps({"LLAVEROS": ["Llaveros"], "ORO": ["Aros"]})
+    content, conflicts = merge_content(CATEGORIES_PATH, base, local, remote)
+    assert conflicts == []
+    assert json.loads(content) == {"LLAVEROS": ["Llaveros", "Mini"], "ORO": ["Aros"]}
+
+
+def test_merge_content_manifest_without_base():
+    local = image_store.dump_manifest({"img/a.jpg": "img/a-1.jpg"})
+    remote = image_store.dump_manifest({"img/b.jpg": "img/b-2.jpg"})
+    content, conflicts = merge_content(MANIFEST_PATH, None, local, remote)
+    assert conflicts == []
+    assert image_store.load_manifest(content) == {"img/a.jpg": "img/a-1.jpg", "img/b.jpg": "img/b-2.jpg"}
+
+
+# --- CatalogStore.resolve_conflict ---
+
+def _conflicted_store(store):
+    base = csv((1, "Oso", 100.0, 1), (2, "Corazón", 200.0, 2), (3, "Estrella", 300.0, 3))
+    store.apply_remote(PRODUCTS_PATH, base, "sha-base", None)
+    store.apply_changes(ChangeSet(updated={1: {"price": 150.0}, 2: {"stock": 0}}), "Precio y stock")
+    # El otro admin cambió el mismo precio (conflicto) y el nombre de otro producto
+    remote = csv((1, "Oso", 120.0, 1), (2, "Corazón", 200.0, 2), (3, "Estrella fugaz", 300.0, 3))
+    local = store.serialize(PRODUCTS_PATH)
+    _, conflicts = merge_content(PRODUCTS_PATH, base, local, remote)
+    assert conflicts
+    store.mark_conflict(PRODUCTS_PATH, conflicts, "sha-remote", remote)
+    return remote
+
+
+def test_resolve_conflict_keep_local_keeps_remote_edits(store):
+    remote = _conflicted_store(store)
+    assert store.resolve_conflict(PRODUCTS_PATH, keep_local=True)
+
+    result = store.read_products().set_index("id")
+    assert result.loc[1, "price"] == 150.0
+    assert result.loc[2, "stock"] == 0
+    assert result.loc[3, "name"] == "Estrella fugaz"
+    assert not store.has_conflict(PRODUCTS_PATH)
+    assert store.remote_state(PRODUCTS_PATH)[0] == "sha-remote"
+    assert store.base_content(PRODUCTS_PATH) == remote
+    assert PRODUCTS_PATH in store.pending_paths()
+
+
+def test_resolve_conflict_use_remote_discards_local_changes(store):
+    _conflicted_store(store)
+    assert store.resolve_conflict(PRODUCTS_PATH, keep_local=False)
+
+    result = store.read_products().set_index("id")
+    assert result.loc[1, "price"] == 120.0
+    assert result.loc[2, "stock"] == 2
+    assert PRODUCTS_PATH not in store.pending_paths()
+
+
+def test_resolve_conflict_without_conflict(store):
+    assert not store.resolve_conflict(PRODUCTS_PATH, keep_local=True)
@@ -0,0 +1,60 @@
+import io
+
+import pytest
+
+import catalog_store
+import metrics
+from catalog_store import PRODUCT_COLUMNS, iter_product_rows
+
+HEADER = ",".join(PRODUCT_COLUMNS)
+
+
+def rows(text, **kwargs):
+    return [row for chunk in iter_product_rows(text, **kwargs) for row in chunk]
+
+
+def test_valid_rows_are_native_types():
+    [row] = rows(f"{HEADER}\n7,Oso,LLAVEROS - Llaveros,8700.5,3,img/oso.jpg,Llavero\n")
+    assert row == (7, "Oso", "LLAVEROS - Llaveros", 8700.5, 3, "img/oso.jpg", "Llavero")
+    assert type(row[0]) is int and type(row[4]) is int
+
+
+@pytest.mark.parametrize("product_id", ["abc", "2.5", ""])
+def test_invalid_or_fractional_id_becomes_null(product_id):
+    [row] = rows(f"{HEADER}\n{product_id},Oso,L,100,1,,\n")
+    assert row[0] is None
+    assert row[1] == "Oso"
+
+
+def test_integral_float_id_is_kept():
+    [row] = rows(f"{HEADER}\n3.0,Oso,L,100,1,,\n")
+    assert row[0] == 3 and type(row[0]) is int
+
+
+@pytest.mark.parametrize("price, stock, expected", [
+    ("abc", "1", (0.0, 1)),
+    ("", "", (0.0, 0)),
+    ("99.9", "x", (99.9, 0)),
+])
+def test_invalid_price_or_stock_falls_back_to_zero(price, stock, expected):
+    [row] = rows(f"{HEADER}\n1,Oso,L,{price},{stock},,\n")
+    assert (row[3], row[4]) == expected
+
+
+def test_invalid_values_are_counted_and_logged(caplog):
+    text = f"{HEADER}\n1.5,A,L,abc,1,,\nx,B,L,10,y,,\n3,C,L,10,1,,\n"
+    metrics.reset()
+    with caplog.at_level("WARNING", logger=catalog_store.logger.name):
+        assert len(rows(text)) == 3
+    # id fraccionario, precio, id no numérico y stock
+    assert "4 valor(es)" in caplog.text
+    if metrics.ENABLED:
+        assert metrics.snapshot()[1]["sync.invalid_values"] == 4
+
+
+def test_chunks_and_binary_stream():
+    body = "".join(f"{i},P{i},L,{i}.5,{i},,\n" for i in range(1, 26))
+    stream = io.BytesIO(f"{HEADER}\n{body}".encode("utf-8"))
+    chunks = list(iter_product_rows(stream, chunk_rows=10))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert chunks[2][-1][:5] == (25, "P25", "L", 25.5, 25)
@@ -0,0 +1,109 @@
+import pytest
+
+import catalog_store
+import github_client
+from catalog_store import CSS_PATH, PUSH_RETRY_MAX, PUSH_RETRY_MIN, GitHubSync
+
+
+@pytest.fixture
+def store(store):
+    store.apply_remote(CSS_PATH, "body {}", "sha-css", None)
+    store.write_document(CSS_PATH, "body { color: red; }", "Diseño")
+    return store
+
+
+def test_failed_push_backs_off_exponentially_and_resets_on_success(store, monkeypatch):
+    sync = GitHubSync(store, paths=(CSS_PATH,))
+
+    def fail(*args, **kwargs):
+        raise ConnectionError("GitHub caído")
+
+    monkeypatch.setattr(github_client, "commit_files", fail)
+    delays = []
+    for _ in range(8):
+        assert not sync.push_pending()
+        delays.append(round(sync.retry_at - catalog_store.time.time()))
+    assert delays[:3] == [PUSH_RETRY_MIN, 2 * PUSH_RETRY_MIN, 4 * PUSH_RETRY_MIN]
+    assert max(delays) == PUSH_RETRY_MAX
+
+    status = store.sync_status()[CSS_PATH]
+    assert "GitHub caído" in status["last_error"]
+    assert status["retry_at"] == pytest.approx(sync.retry_at)
+
+    monkeypatch.setattr(github_client, "commit_files", lambda files, *a, **k: {"blobs": {p: "sha-new" for p in files}})
+    assert sync.push_pending()
+    assert sync.push_failures == 0 and sync.retry_at == 0.0
+    status = store.sync_status()[CSS_PATH]
+    assert status["pending"] == 0 and status["last_error"] is None and status["retry_at"] is None
+
+
+def test_commit_cost_counts_blobs_and_tree_listings():
+    assert github_client.commit_cost(0) == github_client.COMMIT_REQUESTS
+    # Dos fotos y products.csv; se comprueba el SHA de products.csv (árbol raíz + files_csv)
+    assert github_client.commit_cost(3, ["files_csv/products.csv"]) == github_client.COMMIT_REQUESTS + 3 + 2
+    assert github_client.commit_cost(2, ["files_csv/products.csv", "casino_theme.css"]) == (
+        github_client.COMMIT_REQUESTS + 2 + 2
+    )
+
+
+def test_push_waits_when_the_budget_cannot_pay_for_every_blob(store, monkeypatch):
+    budget = github_client.RateBudget(reserve=0)
+    monkeypatch.setattr(github_client, "budget", budget)
+    commits = []
+    monkeypatch.setattr(
+        github_client, "commit_files",
+        lambda files, *a, **k: commits.append(files) or {"blobs": {p: "sha" for p in files}},
+    )
+    store.stage_files({f"img/{n}.jpg": b"foto" for n in range(10)}, "Fotos")
+    sync = GitHubSync(store, paths=(CSS_PATH,))
+
+    # Alcanza para un commit sin fotos (COMMIT_REQUESTS) pero no para 11 archivos
+    reset = str(int(catalog_store.time.time()) + 3600)
+    budget.update({"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "10", "X-RateLimit-Reset": reset})
+    assert not sync.push_pending()
+    assert commits == [] and sync.push_failures == 0
+
+    # Después del reset
+    budget.remaining = 100
+    assert sync.push_pending()
+    assert len(commits[0]) == 11
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.headers = headers or {}
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        pass
+
+
+def test_first_pull_of_an_unchanged_seeded_file_keeps_it_and_saves_the_etag(store, tmp_path, monkeypatch):
+    content = b"id,name,category,price,stock,image_path,description\n1,Oso,L,100,1,,\n"
+    (tmp_path / "files_csv").mkdir()
+    (tmp_path / "files_csv" / "products.csv").write_bytes(content)
+    monkeypatch.chdir(tmp_path)
+    assert catalog_store.seed_from_checkout(store, catalog_store.PRODUCTS_PATH)
+    revision = store.versions()[catalog_store.PRODUCTS_PATH]
+
+    # Más de 1 MB en GitHub: sin contenido en línea; con el mismo SHA no se pide el blob
+    info = {"sha": github_client.blob_sha(content), "encoding": "none"}
+    requests = []
+    monkeypatch.setattr(
+        github_client, "get_contents",
+        lambda path, etag=None: requests.append(etag) or FakeResponse(200, info, {"ETag": '"e1"'}),
+    )
+    monkeypatch.setattr(github_client, "open_blob", lambda sha: pytest.fail("no debería bajar el blob"))
+    sync = GitHubSync(store, paths=(catalog_store.PRODUCTS_PATH,))
+
+    assert not sync.pull(catalog_store.PRODUCTS_PATH)
+    assert store.versions()[catalog_store.PRODUCTS_PATH] == revision
+    assert store.remote_state(catalog_store.PRODUCTS_PATH) == (info["sha"], '"e1"')
+    assert store.staleness(catalog_store.PRODUCTS_PATH)[0] is not None
+
+    sync.pull(catalog_store.PRODUCTS_PATH)
+    assert requests == [None, '"e1"']